@@ -0,0 +1,116 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from trade_engine import (
+    LOCK_STALE_SECONDS,
+    acquire_lock,
+    day_snapshots,
+    lock_path,
+    merge_accounts,
+    merge_external_days,
+    release_lock,
+)
+
+
+def trade(asset, pl):
+    return {"side": "Compra", "asset": asset, "pl": pl, "obs": "", "account": "Padrão"}
+
+
+A = trade("WIN", 10.0)
+B = trade("WDO", -5.0)
+C = trade("PETR4", 3.0)
+
+
+class MergeExternalDaysTest(unittest.TestCase):
+    def merge(self, base, local, disk, dirty):
+        base_days = day_snapshots(base)
+        changed, new_base = merge_external_days(local, disk, base_days, dirty)
+        self.assertEqual(new_base, day_snapshots(disk))
+        return changed
+
+    def test_local_delete_and_disk_insert_on_same_day(self) -> None:
+        base = {"2026-01-02": [A]}
+        local = {}  # usuário apagou A
+        disk = {"2026-01-02": [A, B]}  # script acrescentou B
+        changed = self.merge(base, local, disk, {"2026-01-02"})
+        self.assertEqual(changed, {"2026-01-02"})
+        self.assertEqual(local, {"2026-01-02": [B]})
+
+    def test_identical_trades_appended_externally(self) -> None:
+        base = {"2026-01-02": [A]}
+        local = {"2026-01-02": [A, B]}
+        disk = {"2026-01-02": [A, A, A]}
+        self.merge(base, local, disk, {"2026-01-02"})
+        self.assertEqual(local, {"2026-01-02": [A, B, A, A]})
+
+    def test_disk_remove_of_one_identical_trade(self) -> None:
+        base = {"2026-01-02": [A, A]}
+        local = {"2026-01-02": [A, A, C]}
+        disk = {"2026-01-02": [A]}
+        self.merge(base, local, disk, {"2026-01-02"})
+        self.assertEqual(local, {"2026-01-02": [A, C]})
+
+    def test_clean_day_replaced_or_removed_from_disk(self) -> None:
+        base = {"2026-01-02": [A], "2026-01-03": [B], "2026-01-04": [C]}
+        local = {"2026-01-02": [A], "2026-01-03": [B], "2026-01-04": [C]}
+        disk = {"2026-01-02": [C], "2026-01-04": [C], "2026-01-05": [A]}
+        changed = self.merge(base, local, disk, set())
+        self.assertEqual(changed, {"2026-01-02", "2026-01-03", "2026-01-05"})
+        self.assertEqual(local, {"2026-01-02": [C], "2026-01-04": [C], "2026-01-05": [A]})
+
+    def test_unchanged_disk_keeps_local_edits(self) -> None:
+        base = {"2026-01-02": [A]}
+        local = {"2026-01-02": [A, B]}
+        changed = self.merge(base, local, {"2026-01-02": [A]}, {"2026-01-02"})
+        self.assertEqual(changed, set())
+        self.assertEqual(local, {"2026-01-02": [A, B]})
+
+
+class MergeAccountsTest(unittest.TestCase):
+    def test_account_added_on_both_sides(self) -> None:
+        merged = merge_accounts(["Padrão", "Real"], ["Padrão", "Simulador"], ["Padrão"], True)
+        self.assertEqual(merged, ["Padrão", "Real", "Simulador"])
+
+    def test_same_account_added_on_both_sides(self) -> None:
+        merged = merge_accounts(["Padrão", "Real"], ["Padrão", "Real"], ["Padrão"], True)
+        self.assertEqual(merged, ["Padrão", "Real"])
+
+    def test_disk_wins_without_local_changes(self) -> None:
+        self.assertEqual(merge_accounts(["Padrão", "Real"], ["Padrão"], ["Padrão", "Real"], False), ["Padrão"])
+
+
+class LockTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "diario.json"
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_held_lock_times_out(self) -> None:
+        self.assertTrue(acquire_lock(self.path))
+        try:
+            start = time.monotonic()
+            self.assertFalse(acquire_lock(self.path, timeout=0.1))
+            self.assertLess(time.monotonic() - start, 2)
+        finally:
+            release_lock(self.path)
+        self.assertFalse(lock_path(self.path).exists())
+        self.assertTrue(acquire_lock(self.path, timeout=0))
+        release_lock(self.path)
+
+    def test_stale_lock_is_broken(self) -> None:
+        lock = lock_path(self.path)
+        lock.write_text("outro-host 1\n", encoding="utf-8")
+        old = time.time() - LOCK_STALE_SECONDS - 5
+        os.utime(lock, (old, old))
+        self.assertTrue(acquire_lock(self.path, timeout=0))
+        self.assertNotIn("outro-host", lock.read_text(encoding="utf-8"))
+        release_lock(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import copy
+import unittest
+
+from trade_history import HISTORY_LIMIT, History, apply_ops, parse_history_limit
+
+
+def trade(asset, pl):
+    return {"side": "Compra", "asset": asset, "pl": pl, "obs": "", "account": "Padrão"}
+
+
+A = trade("WIN", 10.0)
+B = trade("WDO", -4.0)
+
+
+def journal():
+    return {"trades": {"2026-01-02": [A], "2026-01-03": [B]}, "accounts": ["Padrão", "Real"]}
+
+
+class ApplyOpsTest(unittest.TestCase):
+    def assert_round_trip(self, ops) -> None:
+        data = journal()
+        before = copy.deepcopy(data)
+        inverses, _ = apply_ops(data, ops)
+        self.assertNotEqual(data, before)
+        apply_ops(data, inverses)
+        self.assertEqual(data, before)
+
+    def test_insert_round_trip(self) -> None:
+        self.assert_round_trip([("insert", "2026-01-02", 0, B), ("insert", "2026-01-04", 0, A)])
+
+    def test_remove_round_trip(self) -> None:
+        # Remover a única operação do dia apaga a chave; desfazer a recria
+        self.assert_round_trip([("remove", "2026-01-02", 0)])
+
+    def test_add_account_round_trip(self) -> None:
+        self.assert_round_trip([("add_account", "Simulador", 1)])
+
+    def test_remove_account_round_trip(self) -> None:
+        data = journal()
+        inverses, _ = apply_ops(data, [("remove_account", "Padrão")])
+        self.assertEqual(data["accounts"], ["Real"])
+        apply_ops(data, inverses)
+        self.assertEqual(data["accounts"], ["Padrão", "Real"])
+
+    def test_remove_leaves_no_empty_day(self) -> None:
+        data = journal()
+        apply_ops(data, [("remove", "2026-01-02", 0)])
+        self.assertNotIn("2026-01-02", data["trades"])
+
+    def test_unknown_op(self) -> None:
+        with self.assertRaises(ValueError):
+            apply_ops(journal(), [("rename", "x")])
+
+
+class HistoryTest(unittest.TestCase):
+    def test_pl_deltas(self) -> None:
+        data = journal()
+        history = History()
+        changes = history.apply(data, [
+            ("insert", "2026-01-02", 1, trade("WIN", 5.5)),
+            ("remove", "2026-01-03", 0),
+            ("add_account", "Simulador", 2),
+        ])
+        self.assertEqual(changes, {"2026-01-02": 5.5, "2026-01-03": 4.0, "accounts": 0.0})
+        self.assertEqual(history.undo(data), {"2026-01-02": -5.5, "2026-01-03": -4.0, "accounts": 0.0})
+        self.assertEqual(data, journal())
+        self.assertEqual(history.redo(data), {"2026-01-02": 5.5, "2026-01-03": 4.0, "accounts": 0.0})
+
+    def test_invalid_pl_counts_as_zero(self) -> None:
+        changes = History().apply(journal(), [("insert", "2026-01-05", 0, trade("WIN", "abc"))])
+        self.assertEqual(changes, {"2026-01-05": 0.0})
+
+    def test_empty_stacks(self) -> None:
+        history = History()
+        self.assertIsNone(history.undo(journal()))
+        self.assertIsNone(history.redo(journal()))
+        self.assertFalse(history.can_undo() or history.can_redo())
+
+    def test_limit_drops_oldest(self) -> None:
+        data = {"trades": {}, "accounts": ["Padrão"]}
+        history = History(limit=3)
+        for i in range(5):
+            history.apply(data, [("insert", "2026-01-02", i, trade("WIN", float(i)))])
+        undone = 0
+        while history.undo(data) is not None:
+            undone += 1
+        self.assertEqual(undone, 3)
+        self.assertEqual([t["pl"] for t in data["trades"]["2026-01-02"]], [0.0, 1.0])
+
+    def test_apply_clears_redo(self) -> None:
+        data = journal()
+        history = History()
+        history.apply(data, [("add_account", "Simulador", 2)])
+        history.undo(data)
+        self.assertTrue(history.can_redo())
+        history.apply(data, [("add_account", "Outra", 2)])
+        self.assertFalse(history.can_redo())
+        self.assertIsNone(history.redo(data))
+
+    def test_discard_keeps_unrelated_entries(self) -> None:
+        data = journal()
+        history = History()
+        history.apply(data, [("insert", "2026-01-02", 1, B)])
+        history.apply(data, [("insert", "2026-01-03", 1, A)])
+        history.apply(data, [("add_account", "Simulador", 2)])
+        history.discard({"2026-01-03"})
+        self.assertEqual(history.undo(data), {"accounts": 0.0})
+        self.assertEqual(history.undo(data), {"2026-01-02": 4.0})
+        self.assertIsNone(history.undo(data))
+
+    def test_discard_redo_stack(self) -> None:
+        data = journal()
+        history = History()
+        history.apply(data, [("insert", "2026-01-02", 1, B)])
+        history.undo(data)
+        history.discard({"2026-01-02"})
+        self.assertFalse(history.can_redo())
+
+    def test_clear(self) -> None:
+        data = journal()
+        history = History()
+        history.apply(data, [("add_account", "Simulador", 2)])
+        history.clear()
+        self.assertFalse(history.can_undo())
+
+
+class ParseHistoryLimitTest(unittest.TestCase):
+    def test_values(self) -> None:
+        self.assertEqual(parse_history_limit(" 7 "), 7)
+        for raw in (None, "", "abc", "0", "-3", "1.5"):
+            self.assertEqual(parse_history_limit(raw), HISTORY_LIMIT)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import http.client
+import json
+import unittest
+
+from trade_ingest import IngestServer
+
+
+TOKEN = "token-de-teste"
+
+
+class IngestServerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = IngestServer(0, token=TOKEN)
+        self.port = self.server.start()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def request(self, method, path, body=None, headers=None):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        try:
+            sent = {"Authorization": f"Bearer {TOKEN}", "Content-Type": "application/json"}
+            sent.update(headers or {})
+            data = None if body is None else json.dumps(body).encode("utf-8")
+            conn.request(method, path, body=data, headers={k: v for k, v in sent.items() if v is not None})
+            resp = conn.getresponse()
+            return resp.status, json.loads(resp.read().decode("utf-8"))
+        finally:
+            conn.close()
+
+    def test_single_trade(self) -> None:
+        trade = {"date": "2026-01-15", "side": "Compra", "asset": "WIN", "pl": "150,5",
+                 "account": "Conta Real", "entry": "9:05", "exit": "09:12:30"}
+        status, body = self.request("POST", "/trades", trade)
+        self.assertEqual((status, body), (202, {"accepted": 1}))
+        self.assertEqual(self.server.drain(), [("2026-01-15", {
+            "side": "Compra", "asset": "WIN", "pl": 150.5, "obs": "",
+            "account": "Conta Real", "entry": "09:05", "exit": "09:12:30",
+        })])
+        self.assertEqual(self.server.drain(), [])
+
+    def test_batch(self) -> None:
+        trades = [
+            {"date": "2026-01-15", "side": "Compra", "asset": "WIN", "pl": 100},
+            {"date": "2026-01-16", "side": "Venda", "asset": "WDO", "pl": "-20"},
+        ]
+        status, body = self.request("POST", "/trades", {"trades": trades})
+        self.assertEqual((status, body), (202, {"accepted": 2}))
+        items = self.server.drain()
+        self.assertEqual([(key, t["asset"], t["pl"], t["account"]) for key, t in items], [
+            ("2026-01-15", "WIN", 100.0, "Padrão"),
+            ("2026-01-16", "WDO", -20.0, "Padrão"),
+        ])
+
+    def test_batch_is_never_split_by_drain(self) -> None:
+        trades = [{"side": "Compra", "asset": "WIN", "pl": i} for i in range(3)]
+        self.assertEqual(self.request("POST", "/trades", trades)[0], 202)
+        self.assertEqual(self.request("POST", "/trades", trades[:1])[0], 202)
+        self.assertEqual(len(self.server.drain(limit=1)), 3)
+        self.assertEqual(len(self.server.drain(limit=1)), 1)
+        self.assertEqual(self.server.drain(), [])
+
+    def test_deeply_nested_body_is_rejected(self) -> None:
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        try:
+            conn.request("POST", "/trades", body=b"[" * 100000, headers={
+                "Authorization": f"Bearer {TOKEN}", "Content-Type": "application/json",
+            })
+            resp = conn.getresponse()
+            self.assertEqual(resp.status, 400)
+            resp.read()
+        finally:
+            conn.close()
+        self.assertEqual(self.server.drain(), [])
+
+    def test_invalid_batch_is_rejected_whole(self) -> None:
+        trades = [
+            {"side": "Compra", "asset": "WIN", "pl": 100},
+            {"side": "Compra", "asset": "WIN", "pl": 100, "account": None},
+        ]
+        status, body = self.request("POST", "/trades", trades)
+        self.assertEqual(status, 400)
+        self.assertEqual([e["index"] for e in body["errors"]], [1])
+        self.assertEqual(self.server.drain(), [])
+
+    def test_rejects_wrong_content_type(self) -> None:
+        status, _ = self.request("POST", "/trades", {"side": "Compra", "asset": "WIN", "pl": 1},
+                                 {"Content-Type": "text/plain"})
+        self.assertEqual(status, 415)
+        self.assertEqual(self.server.drain(), [])
+
+    def test_rejects_origin(self) -> None:
+        status, _ = self.request("POST", "/trades", {"side": "Compra", "asset": "WIN", "pl": 1},
+                                 {"Origin": "https://example.com"})
+        self.assertEqual(status, 403)
+        self.assertEqual(self.server.drain(), [])
+
+    def test_rejects_missing_or_wrong_token(self) -> None:
+        for auth in (None, "Bearer outro-token"):
+            status, _ = self.request("POST", "/trades", {"side": "Compra", "asset": "WIN", "pl": 1},
+                                     {"Authorization": auth})
+            self.assertEqual(status, 401)
+        self.assertEqual(self.server.drain(), [])
+
+    def test_health(self) -> None:
+        self.assertEqual(self.request("GET", "/health"), (200, {"status": "ok", "pending": 0}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,287 @@
+"""Consultas do Trade Journal pela linha de comando, sem interface gráfica.
+
+Exemplos:
+    python -m trade_cli summary --month 2026-01
+    python -m trade_cli total --from 2026-01-01 --to 2026-03-31 --account "Conta Real"
+    python -m trade_cli list --from 2026-01-01 --to 2026-01-31 --asset WIN --side Compra
+    python -m trade_cli intraday --width 15 --account "Conta Real"
+    python -m trade_cli batch < consultas.txt
+    python -m trade_cli vacuum
+
+No modo `batch` cada linha da entrada é um comando (com os mesmos argumentos
+acima) executado sobre o mesmo diário carregado uma única vez.
+"""
+import argparse
+import calendar
+import json
+import shlex
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from trade_analysis import SLOT_WIDTHS_MINUTES, IntradayColumns, hold_label, slot_label
+from trade_engine import (
+    DATA_FILE,
+    SIDES,
+    date_key,
+    filter_trades,
+    format_vacuum_report,
+    iter_range,
+    month_title,
+    parse_date_key,
+    parse_month_arg,
+    read_journal,
+    sorted_day_keys,
+    summarize,
+    trade_account,
+    trade_pl,
+    trades_for_day,
+    vacuum_journal,
+)
+
+
+class Session:
+    """Diário carregado uma vez e reutilizado por todas as consultas."""
+
+    def __init__(self, path: Path) -> None:
+        # Diferente da interface, arquivo ausente ou inválido é erro, não diário vazio
+        self.data = read_journal(path)
+        self.keys = sorted_day_keys(self.data)
+        self._intraday: Dict[tuple, IntradayColumns] = {}
+
+    def intraday(self, start: Optional[date], end: Optional[date], **filters: Optional[str]) -> IntradayColumns:
+        """Colunas intradiárias por filtro, reaproveitadas entre consultas (ex.: outra largura)."""
+        cache_key = (start, end, filters["asset"], filters["side"], filters["account"])
+        if cache_key not in self._intraday:
+            self._intraday[cache_key] = IntradayColumns(self.data, start, end, self.keys, **filters)
+        return self._intraday[cache_key]
+
+
+def _parse_date(raw: str) -> date:
+    d = parse_date_key(raw)
+    if d is None:
+        raise argparse.ArgumentTypeError(f"data inválida: {raw!r} (use AAAA-MM-DD)")
+    return d
+
+
+def _add_filters(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--asset", help="filtrar por ativo")
+    p.add_argument("--side", choices=SIDES, help="filtrar por tipo de operação")
+    p.add_argument("--account", help="filtrar por conta")
+
+
+def _add_range(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--from", dest="start", type=_parse_date, required=True, help="data inicial (AAAA-MM-DD)")
+    p.add_argument("--to", dest="end", type=_parse_date, required=True, help="data final, inclusive")
+
+
+def build_query_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="trade_cli", add_help=True)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("summary", help="resumo do mês por dia e por semana")
+    p.add_argument("--month", type=parse_month_arg, help="mês (AAAA-MM); padrão: mês atual")
+    _add_filters(p)
+
+    p = sub.add_parser("total", help="total e estatísticas de um intervalo")
+    _add_range(p)
+    _add_filters(p)
+
+    p = sub.add_parser("list", help="lista as operações de um intervalo")
+    _add_range(p)
+    _add_filters(p)
+
+    p = sub.add_parser("intraday", help="resultado por faixa de horário e por tempo de posição")
+    p.add_argument("--from", dest="start", type=_parse_date, help="data inicial (padrão: início do diário)")
+    p.add_argument("--to", dest="end", type=_parse_date, help="data final (padrão: fim do diário)")
+    p.add_argument("--width", type=int, choices=SLOT_WIDTHS_MINUTES, default=15, help="largura das faixas em minutos")
+    _add_filters(p)
+
+    sub.add_parser("batch", help="executa um comando por linha da entrada padrão")
+    sub.add_parser("vacuum", help="remove dias vazios, normaliza e valida o arquivo do diário")
+    return parser
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = build_query_parser()
+    parser.add_argument("--file", type=Path, default=DATA_FILE, help="arquivo do diário")
+    parser.add_argument("--json", action="store_true", help="saída em JSON (uma linha por comando)")
+    return parser
+
+
+def _filters(args: argparse.Namespace) -> Dict[str, Optional[str]]:
+    return {"asset": args.asset, "side": args.side, "account": args.account}
+
+
+def query_summary(session: Session, args: argparse.Namespace) -> Dict[str, Any]:
+    first = args.month or date.today().replace(day=1)
+    year, month = first.year, first.month
+    last = date(year, month, calendar.monthrange(year, month)[1])
+    filters = _filters(args)
+
+    days: List[Dict[str, Any]] = []
+    weeks: List[Dict[str, Any]] = []
+    week_trades: List[Dict[str, Any]] = []
+    all_trades: List[Dict[str, Any]] = []
+    for day in range(1, last.day + 1):
+        d = date(year, month, day)
+        trades = [t for _, t in filter_trades(trades_for_day(session.data, d), **filters)]
+        if trades:
+            days.append({"date": date_key(d), **summarize(trades)})
+        week_trades.extend(trades)
+        all_trades.extend(trades)
+        # Semanas de domingo a sábado, como no calendário da interface
+        if d.weekday() == 5 or d == last:
+            weeks.append({"week": len(weeks) + 1, **summarize(week_trades)})
+            week_trades = []
+
+    return {
+        "command": "summary",
+        "month": f"{year:04d}-{month:02d}",
+        "title": month_title(year, month),
+        **summarize(all_trades),
+        "weeks": weeks,
+        "days": days,
+    }
+
+
+def query_total(session: Session, args: argparse.Namespace) -> Dict[str, Any]:
+    trades = (t for _, _, t in iter_range(session.data, args.start, args.end, session.keys, **_filters(args)))
+    return {
+        "command": "total",
+        "from": date_key(args.start),
+        "to": date_key(args.end),
+        **summarize(trades),
+    }
+
+
+def query_list(session: Session, args: argparse.Namespace) -> Dict[str, Any]:
+    rows = []
+    for key, idx, t in iter_range(session.data, args.start, args.end, session.keys, **_filters(args)):
+        rows.append({
+            "date": key,
+            "index": idx,
+            "side": t.get("side"),
+            "asset": t.get("asset"),
+            "pl": trade_pl(t),
+            "obs": t.get("obs", ""),
+            "account": trade_account(t),
+            "entry": t.get("entry"),
+            "exit": t.get("exit"),
+        })
+    return {"command": "list", "from": date_key(args.start), "to": date_key(args.end), "trades": rows}
+
+
+def query_intraday(session: Session, args: argparse.Namespace) -> Dict[str, Any]:
+    cols = session.intraday(args.start, args.end, **_filters(args))
+    slots = cols.by_time_of_day(args.width)
+    holds = cols.by_holding_time()
+    for row in slots:
+        row["label"] = slot_label(row)
+    for i, row in enumerate(holds):
+        row["label"] = hold_label(row, open_ended=(i == len(holds) - 1))
+    return {
+        "command": "intraday",
+        "width": args.width,
+        "without_time": cols.without_time,
+        "slots": slots,
+        "holds": holds,
+    }
+
+
+QUERIES = {
+    "summary": query_summary,
+    "total": query_total,
+    "list": query_list,
+    "intraday": query_intraday,
+}
+
+
+def _format_stats(r: Dict[str, Any]) -> str:
+    return f"{r['total']:+.2f}  |  {r['count']} operações  |  acerto {r['win_rate'] * 100:.1f}%"
+
+
+def format_text(result: Dict[str, Any]) -> str:
+    command = result["command"]
+    if command == "summary":
+        lines = [f"{result['title']}: {_format_stats(result)}"]
+        for w in result["weeks"]:
+            lines.append(f"  Semana {w['week']}: {_format_stats(w)}")
+        for d in result["days"]:
+            lines.append(f"  {d['date']}: {_format_stats(d)}")
+        return "\n".join(lines)
+    if command == "total":
+        return f"{result['from']} a {result['to']}: {_format_stats(result)}"
+    if command == "intraday":
+        lines = [f"Faixas de {result['width']} min (operações sem horário: {result['without_time']})"]
+        for row in result["slots"]:
+            lines.append(f"  {row['label']:<13}  {_format_stats(row)}")
+        lines.append("Tempo de posição")
+        for row in result["holds"]:
+            lines.append(f"  {row['label']:<13}  {_format_stats(row)}")
+        return "\n".join(lines)
+    lines = []
+    for t in result["trades"]:
+        pl = "inválido" if t["pl"] is None else f"{t['pl']:+.2f}"
+        side = t["side"] or ""
+        asset = t["asset"] or ""
+        account = t["account"] or ""
+        obs = t["obs"] or ""
+        times = "–".join(str(v) for v in (t["entry"], t["exit"]) if v)
+        lines.append(f"{t['date']}  {times:<17}  {side!s:<6}  {asset!s:<10}  {pl:>10}  {account!s:<12}  {obs}")
+    return "\n".join(lines)
+
+
+def run_query(session: Session, args: argparse.Namespace, as_json: bool) -> str:
+    result = QUERIES[args.command](session, args)
+    if as_json:
+        return json.dumps(result, ensure_ascii=False)
+    return format_text(result)
+
+
+def run_batch(session: Session, lines, as_json: bool, out=sys.stdout) -> int:
+    parser = build_query_parser()
+    status = 0
+    for lineno, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            args = parser.parse_args(shlex.split(line))
+            if args.command not in QUERIES:
+                raise ValueError(f"{args.command} não pode ser usado em batch")
+            print(run_query(session, args, as_json), file=out)
+        except SystemExit:
+            # argparse já escreveu a mensagem de erro em stderr
+            print(f"linha {lineno}: comando inválido: {line}", file=sys.stderr)
+            status = 2
+        except ValueError as exc:
+            print(f"linha {lineno}: {exc}", file=sys.stderr)
+            status = 2
+    return status
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "vacuum":
+        try:
+            report = vacuum_journal(args.file)
+        except (OSError, ValueError, RuntimeError) as exc:
+            print(f"erro: {exc}", file=sys.stderr)
+            return 1
+        print(json.dumps(report, ensure_ascii=False) if args.json else format_vacuum_report(report))
+        return 1 if report["errors"] else 0
+    try:
+        session = Session(args.file)
+    except (OSError, ValueError) as exc:
+        print(f"erro: não foi possível ler {args.file}: {exc}", file=sys.stderr)
+        return 1
+    if args.command == "batch":
+        return run_batch(session, sys.stdin, args.json)
+    print(run_query(session, args, args.json))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,674 @@
+"""Núcleo de dados do Trade Journal: leitura, gravação e agregações.
+
+Não depende de tkinter, para ser usado tanto pela interface gráfica quanto
+por scripts e pela linha de comando (`python -m trade_cli`).
+"""
+import argparse
+import bisect
+import json
+import os
+import socket
+import time
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+DATA_FILE = Path(__file__).with_name("trade_journal_data.json")
+DEFAULT_ACCOUNT = "Padrão"
+SIDES = ("Compra", "Venda")
+
+MONTH_NAMES = [
+    "",
+    "Janeiro",
+    "Fevereiro",
+    "Março",
+    "Abril",
+    "Maio",
+    "Junho",
+    "Julho",
+    "Agosto",
+    "Setembro",
+    "Outubro",
+    "Novembro",
+    "Dezembro",
+]
+
+# Paleta compartilhada pela interface gráfica e pelos relatórios HTML
+BG_MAIN = "#0b1620"         # fundo principal mais escuro
+BG_PANEL = "#102131"        # painel lateral
+BG_CELL_NEUTRAL = "#1a2d3b" # célula neutra
+BG_CELL_OUT = "#0a141c"     # dias fora do mês
+GREEN = "#2fb86f"           # verde médio/brilhante
+RED = "#b23a3a"             # vermelho médio
+TEXT_PRIMARY = "#cfe3f0"    # texto principal
+TEXT_MUTED = "#8aa0af"      # texto secundário
+
+# Sincronização com o arquivo em disco (pasta compartilhada / scripts externos)
+LOCK_TIMEOUT_SECONDS = 0.5    # espera máxima pelo lock antes de adiar o salvamento
+LOCK_STALE_SECONDS = 30.0     # lock mais antigo que isso é considerado abandonado
+
+
+def parse_pl(raw: str) -> float:
+    value = raw.strip().replace(",", ".")
+    if value == "":
+        raise ValueError("Valor vazio")
+    return float(value)
+
+
+def parse_time(raw: Any) -> Optional[str]:
+    """Normaliza um horário "H:MM" ou "H:MM:SS"; vazio vira None."""
+    value = str(raw or "").strip()
+    if value == "":
+        return None
+    parts = value.split(":")
+    if len(parts) not in (2, 3):
+        raise ValueError("Horário inválido")
+    h, m = int(parts[0]), int(parts[1])
+    sec = int(parts[2]) if len(parts) == 3 else 0
+    if not (0 <= h < 24 and 0 <= m < 60 and 0 <= sec < 60):
+        raise ValueError("Horário inválido")
+    if len(parts) == 3:
+        return f"{h:02d}:{m:02d}:{sec:02d}"
+    return f"{h:02d}:{m:02d}"
+
+
+def time_seconds(value: Any) -> Optional[int]:
+    """Segundos desde 00:00 de um horário gravado; None se ausente ou inválido."""
+    try:
+        parts = [int(p) for p in str(value).split(":")]
+    except ValueError:
+        return None
+    if len(parts) == 2:
+        return parts[0] * 3600 + parts[1] * 60
+    if len(parts) == 3:
+        return parts[0] * 3600 + parts[1] * 60 + parts[2]
+    return None
+
+
+def validate_trade(
+    side: str,
+    asset: str,
+    pl_raw: Any,
+    obs: str,
+    account: str,
+    entry_raw: Any = "",
+    exit_raw: Any = "",
+) -> Dict[str, Any]:
+    """Valida os campos de uma operação e devolve o registro pronto para gravar.
+
+    Horários de entrada/saída são opcionais e só entram no registro se informados.
+    Levanta ValueError com a mensagem exibida ao usuário.
+    """
+    # Sem str(): null ou lista vindos da API não podem virar "None"/"[...]"
+    if not all(isinstance(v, str) for v in (side, asset, obs, account)):
+        raise ValueError("Campos de texto devem ser texto.")
+    if not all(v is None or isinstance(v, str) for v in (entry_raw, exit_raw)):
+        raise ValueError("Horários devem ser texto (use HH:MM).")
+    if isinstance(pl_raw, bool) or not isinstance(pl_raw, (str, int, float)):
+        raise ValueError("Informe um valor válido para lucro/prejuízo.")
+    side = side.strip()
+    asset = asset.strip()
+    obs = obs.strip()
+    account = account.strip()
+    if side not in SIDES:
+        raise ValueError("Tipo inválido.")
+    if asset == "":
+        raise ValueError("Informe o ativo.")
+    if not account:
+        raise ValueError("Informe a conta.")
+    try:
+        pl_val = parse_pl(str(pl_raw))
+    except Exception:
+        raise ValueError("Informe um valor válido para lucro/prejuízo.") from None
+    try:
+        entry_time = parse_time(entry_raw)
+    except ValueError:
+        raise ValueError("Horário de entrada inválido (use HH:MM).") from None
+    try:
+        exit_time = parse_time(exit_raw)
+    except ValueError:
+        raise ValueError("Horário de saída inválido (use HH:MM).") from None
+    if entry_time and exit_time and time_seconds(exit_time) < time_seconds(entry_time):
+        raise ValueError("Horário de saída anterior ao de entrada.")
+    trade = {
+        "side": side,
+        "asset": asset,
+        "pl": pl_val,
+        "obs": obs,
+        "account": account,
+    }
+    if entry_time:
+        trade["entry"] = entry_time
+    if exit_time:
+        trade["exit"] = exit_time
+    return trade
+
+
+def date_key(d: date) -> str:
+    return d.isoformat()
+
+
+def parse_date_key(key: str) -> Optional[date]:
+    try:
+        y, m, d = map(int, key.split("-"))
+        return date(y, m, d)
+    except Exception:
+        return None
+
+
+def parse_month_arg(raw: str) -> date:
+    """Tipo argparse para "AAAA-MM"; devolve o primeiro dia do mês."""
+    d = parse_date_key(raw + "-01")
+    if d is None:
+        raise argparse.ArgumentTypeError(f"mês inválido: {raw!r} (use AAAA-MM)")
+    return d
+
+
+def month_title(year: int, month: int) -> str:
+    return f"{MONTH_NAMES[month]} {year}"
+
+
+def format_currency_short(value: float) -> str:
+    sign = "-" if value < 0 else ""
+    v = abs(value)
+    if v >= 1000:
+        return f"{sign}${v/1000:.1f}k".replace(".0k", "k")
+    if v >= 100:
+        return f"{sign}${v:,.0f}".replace(",", "")
+    return f"{sign}${v:,.0f}".replace(",", "")
+
+
+def empty_journal() -> Dict[str, Any]:
+    return {"trades": {}, "accounts": [DEFAULT_ACCOUNT]}
+
+
+# ---------------------------------------------------------------------------
+# Persistência
+# ---------------------------------------------------------------------------
+
+def safe_write_json(path: Path, payload: dict) -> None:
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def read_payload(path: Path) -> Dict[str, Any]:
+    """Lê o arquivo do diário e migra o formato antigo. Propaga erros de leitura/JSON."""
+    return migrate_payload(json.loads(path.read_text(encoding="utf-8")))
+
+
+def migrate_payload(payload: Any) -> Dict[str, Any]:
+    if not isinstance(payload, dict):
+        raise ValueError("Formato de arquivo inválido")
+    # Migração de versão anterior onde raiz era trades
+    if "trades" in payload and isinstance(payload["trades"], dict):
+        # Já está no formato novo ou parecido
+        pass
+    else:
+        # Formato antigo: payload é o dicionário de trades
+        # Vamos verificar se parece ser o dicionário de trades
+        # (chaves são datas, valores listas)
+        is_old = True
+        for k, v in payload.items():
+             if not isinstance(v, list):
+                 is_old = False
+                 break
+        if is_old:
+             payload = {"trades": payload, "accounts": [DEFAULT_ACCOUNT]}
+    return payload
+
+
+def load_journal(path: Path = DATA_FILE) -> Dict[str, Any]:
+    """Carrega o diário garantindo a estrutura mínima; arquivo ausente ou inválido vira diário vazio."""
+    data = empty_journal()
+    if path.exists():
+        try:
+            data = read_payload(path)
+        except Exception:
+            pass
+    if not isinstance(data.get("trades"), dict):
+        data["trades"] = {}
+    if "accounts" not in data:
+        data["accounts"] = [DEFAULT_ACCOUNT]
+    return data
+
+
+def read_journal(path: Path) -> Dict[str, Any]:
+    """Como load_journal, mas arquivo ausente ou inválido é erro (OSError/ValueError)."""
+    data = read_payload(path)
+    if not isinstance(data.get("trades"), dict):
+        raise ValueError("Formato de arquivo inválido")
+    data.setdefault("accounts", [DEFAULT_ACCOUNT])
+    return data
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """Assinatura barata (mtime, tamanho) usada para detectar escrita externa."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def trade_snapshot(t: Any) -> str:
+    """Forma canônica de uma operação, usada para compará-las por conteúdo."""
+    return json.dumps(t, ensure_ascii=False, sort_keys=True)
+
+
+def day_snapshot(items: Any) -> Tuple[str, ...]:
+    if not isinstance(items, list):
+        return (trade_snapshot(items),)
+    return tuple(trade_snapshot(t) for t in items)
+
+
+def day_snapshots(trades: Dict[str, Any]) -> Dict[str, Tuple[str, ...]]:
+    return {key: day_snapshot(items) for key, items in trades.items()}
+
+
+def merge_external_days(
+    local: Dict[str, Any],
+    disk: Dict[str, Any],
+    base: Dict[str, Tuple[str, ...]],
+    dirty: Set[str],
+) -> Tuple[Set[str], Dict[str, Tuple[str, ...]]]:
+    """Aplica em `local` apenas os dias que mudaram no disco desde `base`.
+
+    `base` guarda o conteúdo de cada dia como estava no disco na última leitura
+    ou gravação. Dias sem alteração local são substituídos pela versão do disco.
+    Dias alterados dos dois lados recebem um merge de três vias: as operações
+    que o disco incluiu ou removeu em relação à base (contadas por multiplicidade,
+    então operações idênticas não se confundem) são aplicadas sobre a versão local.
+    Retorna as chaves afetadas e a nova base (o conteúdo atual do disco).
+    """
+    disk_base = day_snapshots(disk)
+    changed: Set[str] = set()
+    for key in set(disk_base) | set(base):
+        if disk_base.get(key) == base.get(key):
+            continue
+        changed.add(key)
+        external = disk.get(key)
+        if key not in dirty:
+            if external is None:
+                local.pop(key, None)
+            else:
+                local[key] = external
+            continue
+        base_count = Counter(base.get(key, ()))
+        disk_count = Counter(disk_base.get(key, ()))
+        removed = base_count - disk_count
+        added = disk_count - base_count
+        merged = []
+        for t in local.get(key, []):
+            snap = trade_snapshot(t)
+            if removed[snap] > 0:
+                removed[snap] -= 1
+                continue
+            merged.append(t)
+        for t in external if isinstance(external, list) else []:
+            snap = trade_snapshot(t)
+            if added[snap] > 0:
+                added[snap] -= 1
+                merged.append(t)
+        if merged:
+            local[key] = merged
+        else:
+            local.pop(key, None)
+    return changed, disk_base
+
+
+def merge_accounts(local: List[str], disk: List[str], base: List[str], local_changed: bool) -> List[str]:
+    if disk == base:
+        return local
+    if not local_changed:
+        return list(disk)
+    merged = list(local)
+    for acc in disk:
+        if acc not in base and acc not in merged:
+            merged.append(acc)
+    return merged
+
+
+def lock_path(path: Path) -> Path:
+    return path.with_name(path.name + ".lock")
+
+
+def acquire_lock(path: Path, timeout: float = LOCK_TIMEOUT_SECONDS) -> bool:
+    """Lock consultivo via arquivo criado com O_EXCL ao lado do diário."""
+    lock = lock_path(path)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - lock.stat().st_mtime > LOCK_STALE_SECONDS:
+                    lock.unlink()
+                    continue
+            except FileNotFoundError:
+                # Liberado entre o open e o stat: tenta criar de novo
+                continue
+            except OSError:
+                # Sem permissão para remover o lock abandonado: espera o prazo
+                pass
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+            continue
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.write(f"{socket.gethostname()} {os.getpid()}\n")
+        return True
+
+
+def release_lock(path: Path) -> None:
+    try:
+        lock_path(path).unlink()
+    except OSError:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Consultas e agregações
+# ---------------------------------------------------------------------------
+
+def trade_pl(t: Dict[str, Any]) -> Optional[float]:
+    try:
+        return float(t.get("pl", 0.0))
+    except Exception:
+        return None
+
+
+def trade_account(t: Dict[str, Any]) -> str:
+    # Compatibilidade com registros antigos sem conta
+    return t.get("account", DEFAULT_ACCOUNT)
+
+
+def trades_for_day(data: Dict[str, Any], d: date) -> List[Dict[str, Any]]:
+    trades_dict = data.get("trades", {})
+    if not isinstance(trades_dict, dict):
+        return []
+    return trades_dict.get(date_key(d), [])
+
+
+def day_total(data: Dict[str, Any], d: date) -> float:
+    total = 0.0
+    for t in trades_for_day(data, d):
+        pl = trade_pl(t)
+        if pl is not None:
+            total += pl
+    return total
+
+
+def day_trade_count(data: Dict[str, Any], d: date) -> int:
+    return len(trades_for_day(data, d))
+
+
+def month_total(data: Dict[str, Any], year: int, month: int) -> float:
+    trades_dict = data.get("trades", {})
+    if not isinstance(trades_dict, dict):
+        return 0.0
+    total = 0.0
+    for key, items in trades_dict.items():
+        try:
+            y, m, d = map(int, key.split("-"))
+        except Exception:
+            continue
+        if y == year and m == month:
+            for t in items:
+                pl = trade_pl(t)
+                if pl is not None:
+                    total += pl
+    return total
+
+
+def week_summary_for_date(data: Dict[str, Any], d: date, year: int, month: int) -> Dict[str, float]:
+    """Resumo da semana (domingo a sábado) de `d`, limitado aos dias do mês exibido."""
+    start = d - timedelta(days=(d.weekday() + 1) % 7)
+    end = start + timedelta(days=6)
+    total = 0.0
+    count = 0
+    cur = start
+    while cur <= end:
+        if cur.month == month and cur.year == year:
+            for t in trades_for_day(data, cur):
+                pl = trade_pl(t)
+                if pl is not None:
+                    total += pl
+                count += 1
+        cur += timedelta(days=1)
+    return {"total": total, "count": count}
+
+
+def filter_trades(
+    items: Iterable[Dict[str, Any]],
+    asset: Optional[str] = None,
+    side: Optional[str] = None,
+    account: Optional[str] = None,
+) -> List[Tuple[int, Dict[str, Any]]]:
+    """Filtra as operações de um dia; `None` desativa o filtro. Retorna (índice original, trade)."""
+    result = []
+    for i, t in enumerate(items):
+        if asset is not None and t.get("asset") != asset:
+            continue
+        if side is not None and t.get("side") != side:
+            continue
+        if account is not None and trade_account(t) != account:
+            continue
+        result.append((i, t))
+    return result
+
+
+def summarize(trades: Iterable[Dict[str, Any]]) -> Dict[str, float]:
+    total = 0.0
+    count = 0
+    wins = 0
+    losses = 0
+    for t in trades:
+        count += 1
+        pl = trade_pl(t)
+        if pl is None:
+            continue
+        total += pl
+        if pl > 0:
+            wins += 1
+        elif pl < 0:
+            losses += 1
+    win_rate = wins / count if count else 0.0
+    return {"total": total, "count": count, "wins": wins, "losses": losses, "win_rate": win_rate}
+
+
+def sorted_day_keys(data: Dict[str, Any]) -> List[str]:
+    """Chaves de dias válidas em ordem; base para consultas por intervalo com bisect."""
+    trades_dict = data.get("trades", {})
+    if not isinstance(trades_dict, dict):
+        return []
+    return sorted(k for k in trades_dict if parse_date_key(k) is not None)
+
+
+def iter_range(
+    data: Dict[str, Any],
+    start: date,
+    end: date,
+    keys: Optional[List[str]] = None,
+    asset: Optional[str] = None,
+    side: Optional[str] = None,
+    account: Optional[str] = None,
+) -> Iterable[Tuple[str, int, Dict[str, Any]]]:
+    """Percorre as operações de `start` a `end` (inclusive) como (dia, índice, trade).
+
+    `keys` é o resultado de `sorted_day_keys`; passe-o ao fazer várias consultas
+    sobre o mesmo diário para não reordenar as chaves a cada chamada.
+    """
+    if keys is None:
+        keys = sorted_day_keys(data)
+    trades_dict = data["trades"]
+    lo = bisect.bisect_left(keys, date_key(start))
+    hi = bisect.bisect_right(keys, date_key(end))
+    for key in keys[lo:hi]:
+        for i, t in filter_trades(trades_dict[key], asset, side, account):
+            yield key, i, t
+
+
+# ---------------------------------------------------------------------------
+# Manutenção
+# ---------------------------------------------------------------------------
+
+def normalize_journal(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Valida e normaliza o diário numa única passada sobre os registros.
+
+    Remove dias vazios, unifica chaves de data fora do padrão AAAA-MM-DD,
+    preenche `account` (ausente ou null)/`obs` ausentes, converte `pl` em texto
+    para número e cadastra contas usadas que não estão na lista. Registros que
+    não podem ser corrigidos são mantidos como estão e listados em "errors";
+    contas inválidas nunca entram na lista de contas.
+    """
+    trades_dict = data.get("trades")
+    if not isinstance(trades_dict, dict):
+        trades_dict = {}
+    accounts = data.get("accounts")
+    if not isinstance(accounts, list):
+        accounts = [DEFAULT_ACCOUNT]
+    invalid_accounts = [a for a in accounts if not isinstance(a, str) or not a.strip()]
+    accounts = [a for a in accounts if a not in invalid_accounts]
+    known_accounts = set(accounts)
+
+    stats: Dict[str, Any] = {
+        "days": 0,
+        "trades": 0,
+        "empty_days": 0,
+        "renamed_days": 0,
+        "normalized_records": 0,
+        "added_accounts": 0,
+        "errors": [],
+    }
+    errors: List[str] = stats["errors"]
+    for a in invalid_accounts:
+        errors.append(f"accounts: conta inválida removida ({a!r})")
+    cleaned: Dict[str, Any] = {}
+    for key, items in trades_dict.items():
+        d = parse_date_key(key)
+        if d is None or not isinstance(items, list):
+            errors.append(f"{key}: dia inválido")
+            cleaned[key] = items
+            continue
+        if not items:
+            stats["empty_days"] += 1
+            continue
+        for i, t in enumerate(items):
+            if not isinstance(t, dict):
+                errors.append(f"{key}[{i}]: registro não é um objeto")
+                continue
+            changed = False
+            if t.get("account") is None:
+                t["account"] = DEFAULT_ACCOUNT
+                changed = True
+            if "obs" not in t:
+                t["obs"] = ""
+                changed = True
+            pl = t.get("pl")
+            if isinstance(pl, str) or isinstance(pl, bool) or pl is None:
+                try:
+                    t["pl"] = parse_pl(str(pl))
+                    changed = True
+                except Exception:
+                    errors.append(f"{key}[{i}]: valor de L/P inválido ({pl!r})")
+            elif not isinstance(pl, (int, float)):
+                errors.append(f"{key}[{i}]: valor de L/P inválido ({pl!r})")
+            if t.get("side") not in SIDES:
+                errors.append(f"{key}[{i}]: tipo inválido ({t.get('side')!r})")
+            if not isinstance(t.get("asset"), str) or not t["asset"].strip():
+                errors.append(f"{key}[{i}]: ativo ausente")
+            for field in ("entry", "exit"):
+                if field in t and time_seconds(t[field]) is None:
+                    errors.append(f"{key}[{i}]: horário inválido em {field} ({t[field]!r})")
+            if not isinstance(t["account"], str) or not t["account"].strip():
+                errors.append(f"{key}[{i}]: conta inválida ({t['account']!r})")
+            elif t["account"] not in known_accounts:
+                known_accounts.add(t["account"])
+                accounts.append(t["account"])
+                stats["added_accounts"] += 1
+            if changed:
+                stats["normalized_records"] += 1
+        iso = date_key(d)
+        if iso != key:
+            stats["renamed_days"] += 1
+        cleaned.setdefault(iso, []).extend(items)
+
+    stats["days"] = len(cleaned)
+    stats["trades"] = sum(len(v) for v in cleaned.values() if isinstance(v, list))
+    data["trades"] = cleaned
+    data["accounts"] = accounts
+    return stats
+
+
+def _timed_dump(payload: Dict[str, Any]) -> Tuple[str, float]:
+    start = time.perf_counter()
+    text = json.dumps(payload, ensure_ascii=False, indent=2)
+    return text, time.perf_counter() - start
+
+
+def _timed_parse(text: str) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    payload = json.loads(text)
+    return payload, time.perf_counter() - start
+
+
+def vacuum_journal(path: Path = DATA_FILE) -> Dict[str, Any]:
+    """Compacta o arquivo do diário com `normalize_journal` e mede o ganho.
+
+    Os tempos de leitura/gravação são os de parse e serialização do JSON
+    antes e depois. Levanta RuntimeError se outra instância estiver gravando.
+    """
+    if not acquire_lock(path):
+        raise RuntimeError("Diário em uso por outra instância; tente novamente.")
+    try:
+        text = path.read_text(encoding="utf-8")
+        payload, load_before = _timed_parse(text)
+        data = migrate_payload(payload)
+        _, save_before = _timed_dump(data)
+        size_before = len(text.encode("utf-8"))
+
+        stats = normalize_journal(data)
+
+        new_text, save_after = _timed_dump(data)
+        _, load_after = _timed_parse(new_text)
+        if new_text != text:
+            tmp_path = path.with_suffix(path.suffix + ".tmp")
+            tmp_path.write_text(new_text, encoding="utf-8")
+            os.replace(tmp_path, path)
+    finally:
+        release_lock(path)
+
+    stats.update({
+        "size_before": size_before,
+        "size_after": len(new_text.encode("utf-8")),
+        "load_before": load_before,
+        "load_after": load_after,
+        "save_before": save_before,
+        "save_after": save_after,
+    })
+    return stats
+
+
+def format_vacuum_report(report: Dict[str, Any]) -> str:
+    saved = report["size_before"] - report["size_after"]
+    delta = f"{saved} a menos" if saved >= 0 else f"{-saved} a mais"
+    lines = [
+        f"Dias: {report['days']}  |  Operações: {report['trades']}",
+        f"Dias vazios removidos: {report['empty_days']}",
+        f"Datas corrigidas: {report['renamed_days']}",
+        f"Registros normalizados: {report['normalized_records']}",
+        f"Contas cadastradas: {report['added_accounts']}",
+        f"Tamanho: {report['size_before']} -> {report['size_after']} bytes ({delta})",
+        f"Leitura: {report['load_before'] * 1000:.1f} -> {report['load_after'] * 1000:.1f} ms",
+        f"Gravação: {report['save_before'] * 1000:.1f} -> {report['save_after'] * 1000:.1f} ms",
+    ]
+    errors = report["errors"]
+    if errors:
+        lines.append(f"Problemas encontrados ({len(errors)}):")
+        lines.extend(f"  {e}" for e in errors[:20])
+        if len(errors) > 20:
+            lines.append(f"  ... e mais {len(errors) - 20}")
+    return "\n".join(lines)
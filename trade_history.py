@@ -0,0 +1,140 @@
+"""Desfazer/refazer baseado em operações inversas.
+
+Toda alteração do diário é expressa como uma lista de operações primitivas:
+
+    ("insert", dia, índice, trade)    insere a operação na posição do dia
+    ("remove", dia, índice)           remove a operação da posição do dia
+    ("add_account", nome, posição)    cadastra a conta na posição
+    ("remove_account", nome)          remove a conta
+
+Ao aplicar uma lista, o histórico guarda apenas as inversas (o trade só é
+copiado quando uma operação é removida), nunca um snapshot do diário. O
+número de entradas é limitado por `limit`.
+
+Aplicar, desfazer e refazer devolvem a variação de L/P por chave afetada,
+para que quem exibe totais os ajuste sem percorrer o diário de novo.
+"""
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from trade_engine import DEFAULT_ACCOUNT, trade_pl
+
+
+HISTORY_LIMIT = 100
+
+Op = Tuple[Any, ...]
+
+
+def parse_history_limit(raw: Optional[str]) -> int:
+    """Número de níveis de desfazer configurado; valor ausente ou inválido vira HISTORY_LIMIT."""
+    try:
+        limit = int(str(raw).strip())
+    except ValueError:
+        return HISTORY_LIMIT
+    return limit if limit >= 1 else HISTORY_LIMIT
+
+
+def apply_op(data: Dict[str, Any], op: Op) -> Tuple[Op, str]:
+    """Aplica uma operação e devolve (operação inversa, chave afetada).
+
+    A chave afetada é o dia ("AAAA-MM-DD") ou "accounts".
+    """
+    kind = op[0]
+    if kind == "insert":
+        _, key, index, trade = op
+        data["trades"].setdefault(key, []).insert(index, trade)
+        return ("remove", key, index), key
+    if kind == "remove":
+        _, key, index = op
+        items = data["trades"][key]
+        trade = items.pop(index)
+        if not items:
+            # Não deixa dias vazios no arquivo
+            del data["trades"][key]
+        return ("insert", key, index, trade), key
+    if kind == "add_account":
+        _, name, position = op
+        data.setdefault("accounts", [DEFAULT_ACCOUNT]).insert(position, name)
+        return ("remove_account", name), "accounts"
+    if kind == "remove_account":
+        _, name = op
+        accounts = data["accounts"]
+        position = accounts.index(name)
+        accounts.pop(position)
+        return ("add_account", name, position), "accounts"
+    raise ValueError(f"Operação desconhecida: {kind!r}")
+
+
+def _pl_delta(op: Op, inverse: Op) -> float:
+    """Variação de L/P causada por `op` (o trade removido está na inversa)."""
+    if op[0] == "insert":
+        return trade_pl(op[3]) or 0.0
+    if op[0] == "remove":
+        return -(trade_pl(inverse[3]) or 0.0)
+    return 0.0
+
+
+def apply_ops(data: Dict[str, Any], ops: List[Op]) -> Tuple[List[Op], Dict[str, float]]:
+    """Aplica as operações em ordem; as inversas saem na ordem em que devem ser desfeitas.
+
+    Devolve também {chave afetada: variação de L/P} ("accounts" varia 0).
+    """
+    inverses: List[Op] = []
+    changes: Dict[str, float] = {}
+    for op in ops:
+        inverse, key = apply_op(data, op)
+        inverses.append(inverse)
+        changes[key] = changes.get(key, 0.0) + _pl_delta(op, inverse)
+    inverses.reverse()
+    return inverses, changes
+
+
+def _op_key(op: Op) -> str:
+    return op[1] if op[0] in ("insert", "remove") else "accounts"
+
+
+class History:
+    def __init__(self, limit: int = HISTORY_LIMIT) -> None:
+        self._undo: Deque[List[Op]] = deque(maxlen=limit)
+        self._redo: Deque[List[Op]] = deque(maxlen=limit)
+
+    def apply(self, data: Dict[str, Any], ops: List[Op]) -> Dict[str, float]:
+        """Aplica uma alteração do usuário como uma única entrada desfazível."""
+        inverses, changes = apply_ops(data, ops)
+        if inverses:
+            self._undo.append(inverses)
+            self._redo.clear()
+        return changes
+
+    def undo(self, data: Dict[str, Any]) -> Optional[Dict[str, float]]:
+        if not self._undo:
+            return None
+        inverses, changes = apply_ops(data, self._undo.pop())
+        self._redo.append(inverses)
+        return changes
+
+    def redo(self, data: Dict[str, Any]) -> Optional[Dict[str, float]]:
+        if not self._redo:
+            return None
+        inverses, changes = apply_ops(data, self._redo.pop())
+        self._undo.append(inverses)
+        return changes
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def discard(self, keys: Set[str]) -> None:
+        """Esquece entradas que tocam `keys` (ex.: dias alterados por outro processo),
+        pois os índices gravados nelas podem não valer mais."""
+        for stack in (self._undo, self._redo):
+            kept = [entry for entry in stack if not any(_op_key(op) in keys for op in entry)]
+            if len(kept) != len(stack):
+                stack.clear()
+                stack.extend(kept)
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
@@ -0,0 +1,271 @@
+"""API local (HTTP/JSON) para captura automática de operações.
+
+O servidor roda em asyncio numa thread própria e escuta apenas em loopback.
+As operações validadas vão para uma fila thread-safe; quem consome (a
+interface gráfica, via `after`) drena a fila em lotes e grava uma vez por lote.
+
+    POST /trades   corpo: um trade, uma lista de trades ou {"trades": [...]}
+    GET  /health   estado do servidor e tamanho da fila
+
+Toda requisição precisa do cabeçalho `Authorization: Bearer <token>` com o
+token compartilhado; o POST exige `Content-Type: application/json`.
+Requisições com `Origin` (vindas de páginas no navegador) são recusadas.
+
+Cada trade aceita os campos da tela "Nova Operação" mais `date`
+(AAAA-MM-DD, padrão: hoje); `entry`/`exit` (HH:MM ou HH:MM:SS) são opcionais:
+
+    {"date": "2026-01-15", "side": "Compra", "asset": "WIN", "pl": "150,5",
+     "obs": "", "account": "Conta Real", "entry": "09:05", "exit": "09:12:30"}
+
+Um lote é aceito por inteiro ou rejeitado por inteiro (HTTP 400 com os erros
+de cada item).
+"""
+import asyncio
+import hmac
+import json
+import os
+import queue
+import secrets
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from trade_engine import DEFAULT_ACCOUNT, date_key, parse_date_key, validate_trade
+
+
+INGEST_HOST = "127.0.0.1"
+LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+MAX_BODY_BYTES = 1 << 20
+MAX_HEADER_BYTES = 16 << 10
+REQUEST_TIMEOUT_SECONDS = 10.0
+
+REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    411: "Length Required",
+    413: "Payload Too Large",
+    415: "Unsupported Media Type",
+    500: "Internal Server Error",
+}
+
+
+class IngestError(Exception):
+    def __init__(self, status: int, message: str, errors: Optional[List[Dict[str, Any]]] = None) -> None:
+        super().__init__(message)
+        self.status = status
+        self.errors = errors or []
+
+
+def parse_submission(payload: Any, today: Optional[date] = None) -> List[Tuple[str, Dict[str, Any]]]:
+    """Valida um envio e devolve a lista de (chave do dia, trade).
+
+    Levanta IngestError(400) com a mensagem de cada item inválido.
+    """
+    if isinstance(payload, dict) and isinstance(payload.get("trades"), list):
+        raw_items = payload["trades"]
+    elif isinstance(payload, dict):
+        raw_items = [payload]
+    elif isinstance(payload, list):
+        raw_items = payload
+    else:
+        raise IngestError(400, "Corpo deve ser um objeto ou uma lista.")
+    if not raw_items:
+        raise IngestError(400, "Nenhuma operação enviada.")
+
+    default_key = date_key(today or date.today())
+    items: List[Tuple[str, Dict[str, Any]]] = []
+    errors: List[Dict[str, Any]] = []
+    for i, raw in enumerate(raw_items):
+        if not isinstance(raw, dict):
+            errors.append({"index": i, "error": "Operação deve ser um objeto."})
+            continue
+        key = raw.get("date", default_key)
+        if not isinstance(key, str) or parse_date_key(key) is None:
+            errors.append({"index": i, "error": "Data inválida (use AAAA-MM-DD)."})
+            continue
+        try:
+            trade = validate_trade(
+                raw.get("side", ""),
+                raw.get("asset", ""),
+                raw.get("pl", ""),
+                raw.get("obs", ""),
+                raw.get("account", DEFAULT_ACCOUNT),
+                raw.get("entry", ""),
+                raw.get("exit", ""),
+            )
+        except ValueError as exc:
+            errors.append({"index": i, "error": str(exc)})
+            continue
+        items.append((date_key(parse_date_key(key)), trade))
+    if errors:
+        raise IngestError(400, "Operações inválidas; nada foi gravado.", errors)
+    return items
+
+
+def load_or_create_token(path: Path) -> str:
+    """Lê o token compartilhado de `path`, criando-o (legível só pelo dono) se não existir."""
+    try:
+        token = path.read_text(encoding="utf-8").strip()
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    token = secrets.token_urlsafe(24)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+    return token
+
+
+class IngestServer:
+    """Servidor HTTP mínimo em asyncio, executado numa thread daemon.
+
+    Sem `token`, um token aleatório é gerado e fica em `self.token`.
+    """
+
+    def __init__(self, port: int = 0, host: str = INGEST_HOST, token: Optional[str] = None) -> None:
+        if host not in LOOPBACK_HOSTS:
+            raise ValueError("A API de captura só escuta em loopback.")
+        if not 0 <= port <= 65535:
+            raise ValueError("Porta deve estar entre 0 e 65535.")
+        self.host = host
+        self.port = port
+        self.token = token or secrets.token_urlsafe(24)
+        # Cada elemento é um envio inteiro: quem drena nunca recebe meio lote
+        self.queue: "queue.Queue[List[Tuple[str, Dict[str, Any]]]]" = queue.Queue()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def start(self) -> int:
+        """Inicia o servidor e devolve a porta efetiva (útil com port=0)."""
+        self._thread = threading.Thread(target=self._run, name="trade-ingest", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        return self.port
+
+    def stop(self) -> None:
+        if self._loop is None or self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def drain(self, limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Retira da fila tudo o que chegou até agora.
+
+        Com `limit`, para depois do envio que atingir o limite; um envio nunca
+        é dividido entre duas chamadas.
+        """
+        items: List[Tuple[str, Dict[str, Any]]] = []
+        while limit is None or len(items) < limit:
+            try:
+                items.extend(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        self._loop = loop
+        asyncio.set_event_loop(loop)
+        try:
+            self._server = loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, limit=MAX_HEADER_BYTES)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+        except BaseException as exc:
+            self._error = exc
+            self._ready.set()
+            loop.close()
+            return
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self._server.close()
+            loop.run_until_complete(self._server.wait_closed())
+            loop.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            status, body = await asyncio.wait_for(self._dispatch(reader), REQUEST_TIMEOUT_SECONDS)
+        except IngestError as exc:
+            status, body = exc.status, {"error": str(exc)}
+            if exc.errors:
+                body["errors"] = exc.errors
+        except asyncio.TimeoutError:
+            status, body = 408, {"error": "Tempo esgotado."}
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, ConnectionError):
+            status, body = 400, {"error": "Requisição malformada."}
+        except Exception:
+            # Nunca deixa o cliente sem resposta nem a exceção escapar para o loop
+            status, body = 500, {"error": "Erro interno."}
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n"
+        ).encode("ascii")
+        try:
+            writer.write(head + data)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, reader: asyncio.StreamReader) -> Tuple[int, Dict[str, Any]]:
+        raw_head = await reader.readuntil(b"\r\n\r\n")
+        lines = raw_head.decode("latin-1").split("\r\n")
+        method, target, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        path = target.split("?", 1)[0]
+        # Navegadores sempre mandam Origin em POST entre sites; scripts locais não
+        if "origin" in headers:
+            raise IngestError(403, "Requisições de navegador não são aceitas.")
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), self.token.encode()):
+            raise IngestError(401, "Token ausente ou inválido.")
+
+        if path == "/health":
+            if method != "GET":
+                raise IngestError(405, "Use GET.")
+            return 200, {"status": "ok", "pending": self.queue.qsize()}
+        if path != "/trades":
+            raise IngestError(404, "Rota inexistente.")
+        if method != "POST":
+            raise IngestError(405, "Use POST.")
+        media_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        if media_type != "application/json":
+            raise IngestError(415, "Use Content-Type: application/json.")
+        if "content-length" not in headers:
+            raise IngestError(411, "Informe Content-Length.")
+        length = int(headers["content-length"])
+        if length < 0 or length > MAX_BODY_BYTES:
+            raise IngestError(413, "Corpo grande demais.")
+        body = await reader.readexactly(length)
+        try:
+            payload = json.loads(body.decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError, RecursionError):
+            raise IngestError(400, "JSON inválido.") from None
+
+        items = parse_submission(payload)
+        self.queue.put(items)
+        return 202, {"accepted": len(items)}
@@ -1,27 +1,61 @@
 import calendar
-import json
 import os
-import sys
 from datetime import date
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 import tkinter as tk
 from tkinter import messagebox
 from tkinter import ttk
 
-
-DATA_FILE = Path(__file__).with_name("trade_journal_data.json")
-
-# Paleta e fontes (tema escuro com tons ajustados)
-BG_MAIN = "#0b1620"         # fundo principal mais escuro
-BG_PANEL = "#102131"        # painel lateral
+from trade_analysis import SLOT_WIDTHS_MINUTES, IntradayColumns, hold_label, slot_label
+from trade_engine import (
+    BG_CELL_NEUTRAL,
+    BG_CELL_OUT,
+    BG_MAIN,
+    BG_PANEL,
+    DATA_FILE,
+    DEFAULT_ACCOUNT,
+    GREEN,
+    RED,
+    TEXT_MUTED,
+    TEXT_PRIMARY,
+    acquire_lock,
+    date_key as _date_key,
+    day_snapshot,
+    day_snapshots,
+    day_total,
+    day_trade_count,
+    file_signature,
+    filter_trades,
+    format_currency_short,
+    format_vacuum_report,
+    load_journal,
+    merge_accounts,
+    merge_external_days,
+    month_title,
+    month_total,
+    read_payload,
+    release_lock,
+    safe_write_json,
+    trade_account,
+    trade_pl,
+    trades_for_day,
+    vacuum_journal,
+    validate_trade,
+    week_summary_for_date,
+)
+from trade_history import History, parse_history_limit
+from trade_ingest import IngestServer, load_or_create_token
+
+
+POLL_INTERVAL_MS = 1500       # intervalo de verificação de mtime/tamanho do arquivo
+INGEST_DRAIN_MS = 250         # intervalo de aplicação dos lotes recebidos pela API local
+INGEST_PORT_ENV = "TRADE_JOURNAL_API_PORT"  # define a porta para ativar a API local
+INGEST_TOKEN_ENV = "TRADE_JOURNAL_API_TOKEN"  # token da API; sem ele, usa INGEST_TOKEN_FILE
+INGEST_TOKEN_FILE = DATA_FILE.with_name(DATA_FILE.name + ".token")
+HISTORY_LIMIT_ENV = "TRADE_JOURNAL_HISTORY_LIMIT"  # níveis de desfazer (padrão: HISTORY_LIMIT)
+
+# Paleta e fontes (tema escuro com tons ajustados); cores base em trade_engine
 BG_GRID = "#0b1620"         # área do calendário
-BG_CELL_NEUTRAL = "#1a2d3b" # célula neutra
-BG_CELL_OUT = "#0a141c"     # dias fora do mês
-GREEN = "#2fb86f"           # verde médio/brilhante
-RED = "#b23a3a"             # vermelho médio
-TEXT_PRIMARY = "#cfe3f0"    # texto principal
-TEXT_MUTED = "#8aa0af"      # texto secundário
 TEXT_ON_COLOR = "#ffffff"   # texto sobre cores fortes
 BG_INPUT = "#152535"
 BORDER_SOFT = "#102131"
@@ -35,23 +69,6 @@ FONT_DAY = ("Segoe UI", 10, "normal")
 FONT_CELL = ("Segoe UI", 10, "normal")
 FONT_PROFIT = ("Segoe UI", 14, "normal")
 
-def _parse_pl(raw: str) -> float:
-    value = raw.strip().replace(",", ".")
-    if value == "":
-        raise ValueError("Valor vazio")
-    return float(value)
-
-
-def _date_key(d: date) -> str:
-    return d.isoformat()
-
-
-def _safe_write_json(path: Path, payload: dict) -> None:
-    tmp_path = path.with_suffix(path.suffix + ".tmp")
-    tmp_path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
-    os.replace(tmp_path, path)
-
-
 class TradeJournalApp(tk.Tk):
     def __init__(self) -> None:
         super().__init__()
@@ -67,62 +84,263 @@ class TradeJournalApp(tk.Tk):
         # Dados estruturados:
         # self.data["trades"] = { "YYYY-MM-DD": [ ... ] }
         # self.data["accounts"] = [ "Conta Real", "Simulador", ... ]
+        self._disk_sig = file_signature(DATA_FILE)
         self.data: Dict[str, Any] = self._load_data()
-        
-        # Garantir estrutura mínima
-        if "trades" not in self.data:
-            self.data["trades"] = {}
-        if "accounts" not in self.data:
-            self.data["accounts"] = ["Padrão"]
+
+        # Estado conhecido do disco e alterações locais ainda não salvas
+        self._base_days: Dict[str, Tuple[str, ...]] = day_snapshots(self.data["trades"])
+        self._base_accounts: List[str] = list(self.data["accounts"])
+        self._dirty_days: Set[str] = set()
+        self._accounts_dirty = False
+        self._save_pending = False
+
+        # Desfazer/refazer guarda só as operações inversas, não cópias do diário
+        self._history = History(parse_history_limit(os.environ.get(HISTORY_LIMIT_ENV)))
+        # Total do mês exibido: recalculado ao trocar de mês ou ao receber
+        # alterações externas, ajustado pela variação de L/P nas edições locais
+        self._month_pl = 0.0
+        # Incrementado a cada alteração do diário (local ou externa); invalida caches
+        self._revision = 0
+
+        self._visible_days: List[date] = []
+        self._week_numbers: Dict[int, int] = {}
 
         self._build_ui()
         self._build_menu()
         self._render_calendar()
         self._refresh_day_panel()
 
+        self._ingest: Optional[IngestServer] = None
+        self._start_ingest()
+
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.after(POLL_INTERVAL_MS, self._poll_external_changes)
+
     def _build_menu(self) -> None:
         menubar = tk.Menu(self)
         self.config(menu=menubar)
 
         # Menu Arquivo
         file_menu = tk.Menu(menubar, tearoff=0)
-        file_menu.add_command(label="Sair", command=self.quit)
+        file_menu.add_command(label="Compactar Diário", command=self._vacuum)
+        file_menu.add_separator()
+        file_menu.add_command(label="Sair", command=self._on_close)
         menubar.add_cascade(label="Arquivo", menu=file_menu)
 
+        # Menu Editar
+        edit_menu = tk.Menu(menubar, tearoff=0)
+        edit_menu.add_command(label="Desfazer", accelerator="Ctrl+Z", command=self._undo)
+        edit_menu.add_command(label="Refazer", accelerator="Ctrl+Y", command=self._redo)
+        menubar.add_cascade(label="Editar", menu=edit_menu)
+        self.bind_all("<Control-z>", lambda e: self._undo())
+        self.bind_all("<Control-y>", lambda e: self._redo())
+
         # Menu Cadastros
         cadastros_menu = tk.Menu(menubar, tearoff=0)
         cadastros_menu.add_command(label="Contas", command=self._manage_accounts)
         menubar.add_cascade(label="Cadastros", menu=cadastros_menu)
 
+        # Menu Análise
+        analysis_menu = tk.Menu(menubar, tearoff=0)
+        analysis_menu.add_command(label="Horário das Operações", command=self._open_intraday_analysis)
+        menubar.add_cascade(label="Análise", menu=analysis_menu)
+
     def _load_data(self) -> Dict[str, Any]:
-        if not DATA_FILE.exists():
-            return {"trades": {}, "accounts": ["Padrão"]}
+        return load_journal(DATA_FILE)
+
+    def _merge_from_disk(self) -> Optional[Set[str]]:
+        """Incorpora alterações externas dia a dia. Retorna os dias afetados,
+        ou None se o arquivo mudou mas não pôde ser lido."""
+        sig = file_signature(DATA_FILE)
+        if sig is None or sig == self._disk_sig:
+            return set()
         try:
-            payload = json.loads(DATA_FILE.read_text(encoding="utf-8"))
-            if isinstance(payload, dict):
-                # Migração de versão anterior onde raiz era trades
-                if "trades" in payload and isinstance(payload["trades"], dict):
-                    # Já está no formato novo ou parecido
-                    pass
-                else:
-                    # Formato antigo: payload é o dicionário de trades
-                    # Vamos verificar se parece ser o dicionário de trades
-                    # (chaves são datas, valores listas)
-                    is_old = True
-                    for k, v in payload.items():
-                         if not isinstance(v, list):
-                             is_old = False
-                             break
-                    if is_old:
-                         payload = {"trades": payload, "accounts": ["Padrão"]}
-                
-                return payload
+            payload = read_payload(DATA_FILE)
         except Exception:
-            pass
-        return {"trades": {}, "accounts": ["Padrão"]}
+            # Arquivo em escrita por outro processo; tenta de novo no próximo ciclo
+            return None
+        disk_trades = payload.get("trades", {})
+        if not isinstance(disk_trades, dict):
+            disk_trades = {}
+        changed, self._base_days = merge_external_days(
+            self.data["trades"], disk_trades, self._base_days, self._dirty_days
+        )
+        disk_accounts = payload.get("accounts", [DEFAULT_ACCOUNT])
+        self.data["accounts"] = merge_accounts(
+            self.data["accounts"], disk_accounts, self._base_accounts, self._accounts_dirty
+        )
+        if self.data["accounts"] != disk_accounts:
+            self._accounts_dirty = True
+        if disk_accounts != self._base_accounts:
+            changed.add("accounts")
+        self._base_accounts = list(disk_accounts)
+        self._disk_sig = sig
+        # Índices gravados no histórico desses dias podem não valer mais
+        self._history.discard(changed)
+        if changed:
+            self._revision += 1
+        if any(k.startswith(self._month_prefix()) for k in changed):
+            self._month_pl = self._month_total()
+        return changed
+
+    def _apply_ops(self, ops: List[Any]) -> Set[str]:
+        """Aplica uma alteração do usuário, registrando-a para desfazer, e grava."""
+        changes = self._history.apply(self.data, ops)
+        self._commit_change(changes)
+        return set(changes)
+
+    def _commit_change(self, changes: Dict[str, float]) -> None:
+        # Ajusta o total do mês antes de gravar: se a gravação incorporar
+        # alterações externas, o recálculo já inclui esta edição
+        month_prefix = self._month_prefix()
+        for key, delta in changes.items():
+            if key.startswith(month_prefix):
+                self._month_pl += delta
+        self._revision += 1
+        touched = set(changes)
+        if "accounts" in touched:
+            self._accounts_dirty = True
+        self._dirty_days |= touched - {"accounts"}
+        self._save_data()
+        self._refresh_days(touched)
+
+    def _undo(self) -> None:
+        changes = self._history.undo(self.data)
+        if changes is not None:
+            self._commit_change(changes)
+
+    def _redo(self) -> None:
+        changes = self._history.redo(self.data)
+        if changes is not None:
+            self._commit_change(changes)
+
+    def _postpone_save(self) -> None:
+        self._save_pending = True
+        self.title("Trade Journal (salvamento pendente)")
 
     def _save_data(self) -> None:
-        _safe_write_json(DATA_FILE, self.data)
+        if not acquire_lock(DATA_FILE):
+            # Outra instância está gravando; o salvamento é refeito no próximo ciclo
+            self._postpone_save()
+            return
+        try:
+            changed = self._merge_from_disk()
+            if changed is None:
+                # Gravação externa em andamento (sem lock): não sobrescreve
+                self._postpone_save()
+                return
+            safe_write_json(DATA_FILE, self.data)
+            self._disk_sig = file_signature(DATA_FILE)
+            trades = self.data["trades"]
+            for key in self._dirty_days | changed:
+                if key in trades:
+                    self._base_days[key] = day_snapshot(trades[key])
+                else:
+                    self._base_days.pop(key, None)
+            self._base_accounts = list(self.data["accounts"])
+            self._dirty_days.clear()
+            self._accounts_dirty = False
+            if self._save_pending:
+                self._save_pending = False
+                self.title("Trade Journal")
+        finally:
+            release_lock(DATA_FILE)
+        if changed:
+            self._refresh_days(changed)
+
+    def _poll_external_changes(self) -> None:
+        try:
+            if self._save_pending:
+                self._save_data()
+            else:
+                changed = self._merge_from_disk()
+                if changed:
+                    self._refresh_days(changed)
+        finally:
+            self.after(POLL_INTERVAL_MS, self._poll_external_changes)
+
+    def _vacuum(self) -> None:
+        """Grava pendências, compacta o arquivo e recarrega o diário normalizado."""
+        self._save_data()
+        if self._save_pending:
+            messagebox.showwarning("Aviso", "Diário em uso por outra instância; tente novamente.")
+            return
+        try:
+            report = vacuum_journal(DATA_FILE)
+        except (OSError, ValueError, RuntimeError) as exc:
+            messagebox.showerror("Erro", f"Não foi possível compactar o diário: {exc}")
+            return
+        self._disk_sig = file_signature(DATA_FILE)
+        self.data = self._load_data()
+        self._base_days = day_snapshots(self.data["trades"])
+        self._base_accounts = list(self.data["accounts"])
+        self._history.clear()
+        self._revision += 1
+        self._render_calendar()
+        messagebox.showinfo("Compactar Diário", format_vacuum_report(report))
+
+    def _start_ingest(self) -> None:
+        port = os.environ.get(INGEST_PORT_ENV, "").strip()
+        if not port:
+            return
+        try:
+            token = os.environ.get(INGEST_TOKEN_ENV, "").strip() or load_or_create_token(INGEST_TOKEN_FILE)
+            server = IngestServer(int(port), token=token)
+            server.start()
+        except (ValueError, OverflowError, OSError) as exc:
+            messagebox.showwarning("Aviso", f"API local não iniciada: {exc}")
+            return
+        self._ingest = server
+        self.after(INGEST_DRAIN_MS, self._drain_ingest)
+
+    def _apply_ingested(self) -> None:
+        """Aplica de uma vez tudo o que a API recebeu: um salvamento e um repaint por lote."""
+        items = self._ingest.drain()
+        if not items:
+            return
+        # Lote inteiro vira uma única entrada de desfazer
+        ops: List[Any] = []
+        sizes: Dict[str, int] = {}
+        accounts = list(self.data["accounts"])
+        for key, trade in items:
+            if key not in sizes:
+                sizes[key] = len(self.data["trades"].get(key, []))
+            ops.append(("insert", key, sizes[key], trade))
+            sizes[key] += 1
+            if trade["account"] not in accounts:
+                ops.append(("add_account", trade["account"], len(accounts)))
+                accounts.append(trade["account"])
+        self._apply_ops(ops)
+
+    def _drain_ingest(self) -> None:
+        try:
+            self._apply_ingested()
+        finally:
+            self.after(INGEST_DRAIN_MS, self._drain_ingest)
+
+    def _on_close(self) -> None:
+        stopped = False
+        while True:
+            if self._ingest is not None:
+                self._apply_ingested()
+            if self._save_pending:
+                self._save_data()
+            if self._save_pending:
+                # Nunca descarta alterações sem perguntar
+                if not messagebox.askretrycancel(
+                    "Aviso",
+                    "Não foi possível salvar o diário: ele está em uso por outra instância "
+                    "ou sendo gravado por outro programa.\n\n"
+                    "Tentar novamente? Cancelar mantém o aplicativo aberto.",
+                ):
+                    return
+                continue
+            if self._ingest is None or stopped:
+                break
+            # Para a API e aplica o que chegou até aqui antes de fechar
+            self._ingest.stop()
+            stopped = True
+        self.destroy()
 
     def _build_ui(self) -> None:
         style = ttk.Style()
@@ -299,14 +517,16 @@ class TradeJournalApp(tk.Tk):
 
 
         # Tabela
-        self.trades_tree = ttk.Treeview(side_frame, columns=("side", "asset", "pl", "obs", "account"), show="headings", height=10)
+        self.trades_tree = ttk.Treeview(side_frame, columns=("side", "time", "asset", "pl", "obs", "account"), show="headings", height=10)
         self.trades_tree.heading("side", text="Op")
+        self.trades_tree.heading("time", text="Horário")
         self.trades_tree.heading("asset", text="Ativo")
         self.trades_tree.heading("pl", text="L/P")
         self.trades_tree.heading("obs", text="Obs")
         self.trades_tree.heading("account", text="Conta")
         
         self.trades_tree.column("side", width=60, anchor="center")
+        self.trades_tree.column("time", width=90, anchor="center")
         self.trades_tree.column("asset", width=80, anchor="w")
         self.trades_tree.column("pl", width=80, anchor="e")
         self.trades_tree.column("obs", width=120, anchor="w")
@@ -381,11 +601,35 @@ class TradeJournalApp(tk.Tk):
         pl_entry.bind("<FocusIn>", lambda e: pl_border.configure(bg=CONTROL_BG_FOCUS))
         pl_entry.bind("<FocusOut>", lambda e: pl_border.configure(bg=BG_PANEL))
 
-        # Linha 3: Obs
-        ttk.Label(form, text="Obs").grid(row=2, column=0, sticky="w", pady=(10,0))
+        # Linha 3: Horários de entrada e saída (opcionais, HH:MM)
+        ttk.Label(form, text="Entrada").grid(row=2, column=0, sticky="w", pady=(10,0))
+        self.entry_time_var = tk.StringVar()
+        entry_border = tk.Frame(form, bg=BG_PANEL, highlightthickness=0, highlightbackground=OUTLINE_SOFT, highlightcolor=OUTLINE_SOFT)
+        entry_border.grid(row=2, column=1, columnspan=2, sticky="ew", pady=(10,0), padx=(0,10))
+        entry_border.columnconfigure(0, weight=1)
+        entry_time_entry = tk.Entry(entry_border, textvariable=self.entry_time_var, bg=CONTROL_BG, fg=TEXT_PRIMARY, insertbackground=TEXT_PRIMARY, relief="flat", bd=0, highlightthickness=0)
+        entry_time_entry.grid(row=0, column=0, sticky="ew")
+        entry_time_entry.bind("<Enter>", lambda e: entry_border.configure(bg=CONTROL_BG_HOVER))
+        entry_time_entry.bind("<Leave>", lambda e: entry_border.configure(bg=BG_PANEL))
+        entry_time_entry.bind("<FocusIn>", lambda e: entry_border.configure(bg=CONTROL_BG_FOCUS))
+        entry_time_entry.bind("<FocusOut>", lambda e: entry_border.configure(bg=BG_PANEL))
+
+        ttk.Label(form, text="Saída").grid(row=2, column=3, sticky="w", pady=(10,0))
+        self.exit_time_var = tk.StringVar()
+        exit_border = tk.Frame(form, bg=BG_PANEL, highlightthickness=0, highlightbackground=OUTLINE_SOFT, highlightcolor=OUTLINE_SOFT)
+        exit_border.grid(row=2, column=4, sticky="ew", pady=(10,0))
+        exit_time_entry = tk.Entry(exit_border, textvariable=self.exit_time_var, bg=CONTROL_BG, fg=TEXT_PRIMARY, insertbackground=TEXT_PRIMARY, relief="flat", bd=0, highlightthickness=0)
+        exit_time_entry.grid(row=0, column=0, sticky="ew")
+        exit_time_entry.bind("<Enter>", lambda e: exit_border.configure(bg=CONTROL_BG_HOVER))
+        exit_time_entry.bind("<Leave>", lambda e: exit_border.configure(bg=BG_PANEL))
+        exit_time_entry.bind("<FocusIn>", lambda e: exit_border.configure(bg=CONTROL_BG_FOCUS))
+        exit_time_entry.bind("<FocusOut>", lambda e: exit_border.configure(bg=BG_PANEL))
+
+        # Linha 4: Obs
+        ttk.Label(form, text="Obs").grid(row=3, column=0, sticky="w", pady=(10,0))
         self.obs_var = tk.StringVar()
         obs_border = tk.Frame(form, bg=BG_PANEL, highlightthickness=0, highlightbackground=OUTLINE_SOFT, highlightcolor=OUTLINE_SOFT)
-        obs_border.grid(row=2, column=1, columnspan=4, sticky="ew", pady=(10,0))
+        obs_border.grid(row=3, column=1, columnspan=4, sticky="ew", pady=(10,0))
         obs_border.columnconfigure(0, weight=1)
         obs_entry = tk.Entry(obs_border, textvariable=self.obs_var, bg=CONTROL_BG, fg=TEXT_PRIMARY, insertbackground=TEXT_PRIMARY, relief="flat", bd=0, highlightthickness=0)
         obs_entry.grid(row=0, column=0, sticky="ew")
@@ -396,7 +640,7 @@ class TradeJournalApp(tk.Tk):
 
         # Botões
         actions = ttk.Frame(form)
-        actions.grid(row=3, column=0, columnspan=5, sticky="ew", pady=(15, 0))
+        actions.grid(row=4, column=0, columnspan=5, sticky="ew", pady=(15, 0))
         actions.columnconfigure(0, weight=1)
         actions.columnconfigure(1, weight=1)
         
@@ -408,77 +652,22 @@ class TradeJournalApp(tk.Tk):
         )
 
     def _month_title(self) -> str:
-        month_name = [
-            "",
-            "Janeiro",
-            "Fevereiro",
-            "Março",
-            "Abril",
-            "Maio",
-            "Junho",
-            "Julho",
-            "Agosto",
-            "Setembro",
-            "Outubro",
-            "Novembro",
-            "Dezembro",
-        ][self.current_month]
-        return f"{month_name} {self.current_year}"
+        return month_title(self.current_year, self.current_month)
 
     def _format_currency_short(self, value: float) -> str:
-        sign = "-" if value < 0 else ""
-        v = abs(value)
-        if v >= 1000:
-            return f"{sign}${v/1000:.1f}k".replace(".0k", "k")
-        if v >= 100:
-            return f"{sign}${v:,.0f}".replace(",", "")
-        return f"{sign}${v:,.0f}".replace(",", "")
+        return format_currency_short(value)
 
     def _month_total(self) -> float:
-        trades_dict = self.data.get("trades", {})
-        if not isinstance(trades_dict, dict):
-            return 0.0
-        total = 0.0
-        for key, items in trades_dict.items():
-            try:
-                y, m, d = map(int, key.split("-"))
-            except Exception:
-                continue
-            if y == self.current_year and m == self.current_month:
-                for t in items:
-                    try:
-                        total += float(t.get("pl", 0.0))
-                    except Exception:
-                        pass
-        return total
+        return month_total(self.data, self.current_year, self.current_month)
+
+    def _month_prefix(self) -> str:
+        return f"{self.current_year:04d}-{self.current_month:02d}-"
 
     def _day_trade_count(self, d: date) -> int:
-        trades_dict = self.data.get("trades", {})
-        if not isinstance(trades_dict, dict):
-            return 0
-        items = trades_dict.get(_date_key(d), [])
-        return len(items)
+        return day_trade_count(self.data, d)
 
     def _week_summary_for_date(self, d: date) -> Dict[str, float]:
-        from datetime import timedelta
-        start = d - timedelta(days=(d.weekday() + 1) % 7)
-        end = start + timedelta(days=6)
-        trades_dict = self.data.get("trades", {})
-        if not isinstance(trades_dict, dict):
-            return {"total": 0.0, "count": 0}
-        total = 0.0
-        count = 0
-        cur = start
-        while cur <= end:
-            if cur.month == self.current_month and cur.year == self.current_year:
-                for t in trades_dict.get(_date_key(cur), []):
-                    try:
-                        total += float(t.get("pl", 0.0))
-                    except Exception:
-                        pass
-                    count += 1
-            cur += timedelta(days=1)
-        return {"total": total, "count": count}
+        return week_summary_for_date(self.data, d, self.current_year, self.current_month)
 
     def _prev_month(self) -> None:
         if self.current_month == 1:
@@ -497,23 +686,12 @@ class TradeJournalApp(tk.Tk):
         self._render_calendar()
 
     def _day_total(self, d: date) -> float:
-        # Recupera trades com segurança da estrutura nova
-        trades_dict = self.data.get("trades", {})
-        if not isinstance(trades_dict, dict):
-            return 0.0
-            
-        items = trades_dict.get(_date_key(d), [])
-        total = 0.0
-        for t in items:
-            try:
-                total += float(t.get("pl", 0.0))
-            except Exception:
-                continue
-        return total
+        return day_total(self.data, d)
 
-    def _render_calendar(self) -> None:
+    def _update_month_header(self) -> None:
         self.month_label.configure(text=self._month_title())
-        month_total = self._month_total()
+        # Arredonda o resíduo de ponto flutuante acumulado pelos ajustes
+        month_total = round(self._month_pl, 6)
         self.month_profit_label.configure(
             text=f"{'+' if month_total>0 else ''}{self._format_currency_short(month_total)} Lucro",
         )
@@ -521,6 +699,10 @@ class TradeJournalApp(tk.Tk):
             foreground=(GREEN if month_total > 0 else RED if month_total < 0 else TEXT_PRIMARY)
         )
 
+    def _render_calendar(self) -> None:
+        self._month_pl = self._month_total()
+        self._update_month_header()
+
         cal = calendar.Calendar(firstweekday=6)
         month_days = list(cal.itermonthdates(self.current_year, self.current_month))
 
@@ -531,47 +713,73 @@ class TradeJournalApp(tk.Tk):
                 days.append(days[-1] + timedelta(days=1))
             return days[:42]
 
-        month_days = pad_to_6_weeks(month_days)
+        self._visible_days = pad_to_6_weeks(month_days)
 
+        # Número da semana exibido nas células de sábado do mês corrente
+        self._week_numbers = {}
         sat_index = 0
-        for idx, d in enumerate(month_days):
-            btn = self.day_buttons[idx]
-
-            in_month = d.month == self.current_month
-            total = self._day_total(d)
-            trade_count = self._day_trade_count(d)
-
-            total_text = ""
-            if abs(total) > 1e-9:
-                total_text = f"\n{self._format_currency_short(total)}"
-            count_text = ""
-            if trade_count > 0:
-                count_text = f"\n{trade_count} operações"
-
-            label_text = f"{d.day}{total_text}{count_text}"
-            if in_month and d.weekday() == 5:
+        for idx, d in enumerate(self._visible_days):
+            if d.month == self.current_month and d.weekday() == 5:
                 sat_index += 1
-                ws = self._week_summary_for_date(d)
-                label_text = f"Semana {sat_index}\n{self._format_currency_short(ws['total'])}\n{int(ws['count'])} operações"
+                self._week_numbers[idx] = sat_index
+
+        for idx in range(len(self._visible_days)):
+            self._paint_day_cell(idx)
+            
+        self._refresh_day_panel()
 
-            btn.configure(text=label_text, state=("normal" if in_month else "disabled"), command=lambda dd=d: self._select_date(dd))
+    def _paint_day_cell(self, idx: int) -> None:
+        d = self._visible_days[idx]
+        btn = self.day_buttons[idx]
 
-            if not in_month:
-                btn.configure(state="disabled", bg=BG_CELL_OUT, fg=TEXT_MUTED)
-            else:
-                if total > 0:
-                    btn.configure(bg=GREEN, fg=TEXT_ON_COLOR)
-                elif total < 0:
-                    btn.configure(bg=RED, fg=TEXT_ON_COLOR)
-                else:
-                    btn.configure(bg=BG_CELL_NEUTRAL, fg=TEXT_PRIMARY)
+        in_month = d.month == self.current_month
+        total = self._day_total(d)
+        trade_count = self._day_trade_count(d)
 
-            if d == self.selected_date and in_month:
-                 btn.configure(relief="flat", highlightthickness=0, highlightbackground=SELECT_BORDER, highlightcolor=SELECT_BORDER)
+        total_text = ""
+        if abs(total) > 1e-9:
+            total_text = f"\n{self._format_currency_short(total)}"
+        count_text = ""
+        if trade_count > 0:
+            count_text = f"\n{trade_count} operações"
+
+        label_text = f"{d.day}{total_text}{count_text}"
+        if idx in self._week_numbers:
+            ws = self._week_summary_for_date(d)
+            label_text = f"Semana {self._week_numbers[idx]}\n{self._format_currency_short(ws['total'])}\n{int(ws['count'])} operações"
+
+        btn.configure(text=label_text, state=("normal" if in_month else "disabled"), command=lambda dd=d: self._select_date(dd))
+
+        if not in_month:
+            btn.configure(state="disabled", bg=BG_CELL_OUT, fg=TEXT_MUTED)
+        else:
+            if total > 0:
+                btn.configure(bg=GREEN, fg=TEXT_ON_COLOR)
+            elif total < 0:
+                btn.configure(bg=RED, fg=TEXT_ON_COLOR)
             else:
-                 btn.configure(relief="flat", highlightthickness=0, highlightbackground=BORDER_SOFT, highlightcolor=BORDER_SOFT)
-            
-        self._refresh_day_panel()
+                btn.configure(bg=BG_CELL_NEUTRAL, fg=TEXT_PRIMARY)
+
+        if d == self.selected_date and in_month:
+             btn.configure(relief="flat", highlightthickness=0, highlightbackground=SELECT_BORDER, highlightcolor=SELECT_BORDER)
+        else:
+             btn.configure(relief="flat", highlightthickness=0, highlightbackground=BORDER_SOFT, highlightcolor=BORDER_SOFT)
+
+    def _refresh_days(self, keys: Set[str]) -> None:
+        """Repinta apenas as células (e o resumo semanal) dos dias alterados."""
+        month_prefix = self._month_prefix()
+        if any(k.startswith(month_prefix) for k in keys):
+            self._update_month_header()
+        cells: Set[int] = set()
+        for idx, d in enumerate(self._visible_days):
+            if _date_key(d) in keys:
+                cells.add(idx)
+                # Sábado da mesma linha mostra o resumo da semana
+                cells.add(idx - idx % 7 + 6)
+        for idx in sorted(cells):
+            self._paint_day_cell(idx)
+        if "accounts" in keys or _date_key(self.selected_date) in keys:
+            self._refresh_day_panel()
 
     def _select_date(self, d: date) -> None:
         self.selected_date = d
@@ -581,15 +789,11 @@ class TradeJournalApp(tk.Tk):
         self._render_calendar()
 
     def _trades_for_selected_day(self) -> List[Dict[str, Any]]:
-        # A chave de trades no self.data["trades"]
-        if "trades" not in self.data:
-            self.data["trades"] = {}
-        return self.data["trades"].setdefault(_date_key(self.selected_date), [])
+        # Somente leitura: não cria a chave do dia (evita dias vazios no arquivo)
+        return self._get_trades_for_day(self.selected_date)
     
     def _get_trades_for_day(self, d: date) -> List[Dict[str, Any]]:
-        if "trades" not in self.data:
-            return []
-        return self.data["trades"].get(_date_key(d), [])
+        return trades_for_day(self.data, d)
 
     def _refresh_day_panel(self) -> None:
         if self.selected_date is None:
@@ -599,7 +803,7 @@ class TradeJournalApp(tk.Tk):
         self.selected_label.configure(text=f"Dia: {date_str}")
 
         # Atualizar lista de contas no combobox
-        accounts = self.data.get("accounts", ["Padrão"])
+        accounts = self.data.get("accounts", [DEFAULT_ACCOUNT])
         self.account_cb['values'] = accounts
         # Atualizar filtro de contas
         self.filter_account_cb['values'] = ["Todas"] + accounts
@@ -617,12 +821,6 @@ class TradeJournalApp(tk.Tk):
         elif not self.account_var.get():
              self.account_var.set(accounts[0])
 
-        total_pl = 0.0
-        wins = 0
-
-        filtered_trades = []
-        filtered_indices = [] # Para manter o índice original para exclusão
-        
         # Coletar ativos únicos para o combobox
         unique_assets = set()
         for t in all_trades:
@@ -631,42 +829,30 @@ class TradeJournalApp(tk.Tk):
         # Atualizar combobox de ativos mantendo seleção se possível
         sorted_assets = sorted(list(unique_assets))
         self.filter_asset_cb['values'] = ["Todos"] + sorted_assets
-        
-        current_day_total = 0.0
-
-        for i, t in enumerate(all_trades):
-            if f_asset != "Todos" and t.get("asset") != f_asset:
-                continue
-            if f_side != "Todos" and t.get("side") != f_side:
-                continue
-            
-            # Filtro de conta (compatibilidade com registros antigos sem conta)
-            t_account = t.get("account", "Padrão")
-            if f_account != "Todas" and t_account != f_account:
-                continue
 
-            filtered_trades.append(t)
-            filtered_indices.append(i)
-            try:
-                current_day_total += float(t.get("pl", 0.0))
-            except:
-                pass
+        # Índice original é mantido para a exclusão
+        filtered = filter_trades(
+            all_trades,
+            asset=None if f_asset == "Todos" else f_asset,
+            side=None if f_side == "Todos" else f_side,
+            account=None if f_account == "Todas" else f_account,
+        )
+        current_day_total = 0.0
+        for _, t in filtered:
+            pl = trade_pl(t)
+            if pl is not None:
+                current_day_total += pl
 
         # Limpar tabela
         for item in self.trades_tree.get_children():
             self.trades_tree.delete(item)
 
         # Preencher tabela
-        for idx_in_filtered, t in enumerate(filtered_trades):
-            original_idx = filtered_indices[idx_in_filtered]
+        for original_idx, t in filtered:
             obs = t.get("obs", "")
-            account = t.get("account", "Padrão")
-            try:
-                pl_val = float(t.get("pl", 0.0))
-            except:
-                pl_val = 0.0
-            
-            self.trades_tree.insert("", "end", iid=str(original_idx), values=(t.get("side"), t.get("asset"), f"{pl_val:+.2f}", obs, account))
+            pl_val = trade_pl(t) or 0.0
+            times = "–".join(v for v in (t.get("entry"), t.get("exit")) if v)
+            self.trades_tree.insert("", "end", iid=str(original_idx), values=(t.get("side"), times, t.get("asset"), f"{pl_val:+.2f}", obs, trade_account(t)))
 
         # Atualizar label de total
         total_day = self._day_total(self.selected_date)
@@ -681,45 +867,31 @@ class TradeJournalApp(tk.Tk):
         self.day_total_label.configure(foreground=color)
 
     def _add_trade(self) -> None:
-        side = self.side_var.get().strip()
-        asset = self.asset_var.get().strip()
-        pl_raw = self.pl_var.get()
-        obs = self.obs_var.get().strip()
-        account = self.account_var.get().strip()
-
-        # Validações
-        if side not in {"Compra", "Venda"}:
-            messagebox.showerror("Erro", "Tipo inválido.")
-            return
-        if asset == "":
-            messagebox.showerror("Erro", "Informe o ativo.")
-            return
-        if not account:
-            messagebox.showerror("Erro", "Informe a conta.")
-            return
-
         try:
-            pl_val = _parse_pl(pl_raw)
-        except Exception:
-            messagebox.showerror("Erro", "Informe um valor válido para lucro/prejuízo.")
+            trade = validate_trade(
+                self.side_var.get(),
+                self.asset_var.get(),
+                self.pl_var.get(),
+                self.obs_var.get(),
+                self.account_var.get(),
+                self.entry_time_var.get(),
+                self.exit_time_var.get(),
+            )
+        except ValueError as exc:
+            messagebox.showerror("Erro", str(exc))
             return
 
-        trades = self._trades_for_selected_day()
-        trades.append({
-            "side": side, 
-            "asset": asset, 
-            "pl": pl_val, 
-            "obs": obs,
-            "account": account
-        })
+        key = _date_key(self.selected_date)
+        index = len(self._trades_for_selected_day())
 
         # Limpeza dos campos
         # self.asset_var.set("") # Mantém o ativo para facilitar inserção repetida
         self.pl_var.set("")
         self.obs_var.set("")
+        self.entry_time_var.set("")
+        self.exit_time_var.set("")
         
-        self._save_data()
-        self._render_calendar()
+        self._apply_ops([("insert", key, index, trade)])
 
     def _manage_accounts(self) -> None:
         """Janela simples para adicionar/remover contas"""
@@ -740,8 +912,14 @@ class TradeJournalApp(tk.Tk):
         lb.pack(side="left", fill="both", expand=True)
         scrollbar.config(command=lb.yview)
         
-        for acc in self.data.get("accounts", []):
-            lb.insert("end", acc)
+        def reload_list():
+            # A lista pode ter mudado por desfazer/refazer ou por outra instância
+            lb.delete(0, "end")
+            for acc in self.data.get("accounts", []):
+                lb.insert("end", acc)
+
+        reload_list()
+        win.bind("<FocusIn>", lambda e: reload_list() if e.widget is win else None)
             
         entry_var = tk.StringVar()
         entry = ttk.Entry(win, textvariable=entry_var)
@@ -753,29 +931,120 @@ class TradeJournalApp(tk.Tk):
         def add_acc():
             name = entry_var.get().strip()
             if name and name not in self.data["accounts"]:
-                self.data["accounts"].append(name)
-                lb.insert("end", name)
+                self._apply_ops([("add_account", name, len(self.data["accounts"]))])
+                reload_list()
                 entry_var.set("")
-                self._save_data()
-                self._refresh_day_panel()
                 
         def del_acc():
             sel = lb.curselection()
             if not sel: return
             idx = sel[0]
             val = lb.get(idx)
-            if val == "Padrão":
+            if val == DEFAULT_ACCOUNT:
                 messagebox.showwarning("Aviso", "Não é possível remover a conta Padrão.")
                 return
             if messagebox.askyesno("Confirmar", f"Excluir conta '{val}'?"):
-                self.data["accounts"].remove(val)
-                lb.delete(idx)
-                self._save_data()
-                self._refresh_day_panel()
+                # Outra instância pode ter removido a conta enquanto a janela estava aberta
+                if val in self.data["accounts"]:
+                    self._apply_ops([("remove_account", val)])
+                reload_list()
 
         ttk.Button(btn_frame, text="Adicionar", command=add_acc).pack(side="left", fill="x", expand=True, padx=(0,5))
         ttk.Button(btn_frame, text="Remover", command=del_acc).pack(side="right", fill="x", expand=True, padx=(5,0))
 
+    def _open_intraday_analysis(self) -> None:
+        """Janela com o resultado por faixa de horário e por tempo de posição"""
+        win = tk.Toplevel(self)
+        win.title("Análise Intradiária")
+        win.geometry("560x600")
+
+        controls = ttk.Frame(win, padding=10)
+        controls.pack(fill="x")
+
+        ttk.Label(controls, text="Período:").pack(side="left", padx=(0, 5))
+        scope_var = tk.StringVar(value="Mês atual")
+        scope_cb = ttk.Combobox(controls, textvariable=scope_var, values=["Mês atual", "Todo o diário"], width=14, state="readonly")
+        scope_cb.pack(side="left", padx=(0, 10))
+
+        ttk.Label(controls, text="Faixa (min):").pack(side="left", padx=(0, 5))
+        width_var = tk.StringVar(value="15")
+        width_cb = ttk.Combobox(controls, textvariable=width_var, values=[str(w) for w in SLOT_WIDTHS_MINUTES], width=4, state="readonly")
+        width_cb.pack(side="left")
+
+        info_label = ttk.Label(win, text="", style="Muted.TLabel", padding=(10, 0))
+        info_label.pack(fill="x")
+
+        def make_tree(title: str) -> ttk.Treeview:
+            frame = ttk.LabelFrame(win, text=title, padding=6)
+            frame.pack(fill="both", expand=True, padx=10, pady=(8, 0))
+            tree = ttk.Treeview(frame, columns=("bucket", "count", "total", "win_rate"), show="headings", height=8)
+            tree.heading("bucket", text="Faixa")
+            tree.heading("count", text="Operações")
+            tree.heading("total", text="L/P")
+            tree.heading("win_rate", text="Acerto")
+            tree.column("bucket", width=140, anchor="w")
+            tree.column("count", width=90, anchor="e")
+            tree.column("total", width=110, anchor="e")
+            tree.column("win_rate", width=80, anchor="e")
+            scroll = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+            tree.configure(yscrollcommand=scroll.set)
+            tree.pack(side="left", fill="both", expand=True)
+            scroll.pack(side="right", fill="y")
+            return tree
+
+        slots_tree = make_tree("Por horário de entrada")
+        holds_tree = make_tree("Por tempo de posição")
+
+        # Colunas extraídas uma vez por período, mês, filtros e versão do diário;
+        # trocar a largura só refaz o histograma
+        cache: Dict[Tuple[Any, ...], IntradayColumns] = {}
+
+        def columns() -> IntradayColumns:
+            scope = scope_var.get()
+            f_asset = self.filter_asset_var.get()
+            f_side = self.filter_side_var.get()
+            f_account = self.filter_account_var.get()
+            key = (scope, self.current_year, self.current_month, f_asset, f_side, f_account, self._revision)
+            if key not in cache:
+                # Colunas de versões anteriores do diário não voltam a ser usadas
+                for stale in [k for k in cache if k[-1] != self._revision]:
+                    del cache[stale]
+                start = end = None
+                if scope == "Mês atual":
+                    start = date(self.current_year, self.current_month, 1)
+                    end = date(self.current_year, self.current_month, calendar.monthrange(self.current_year, self.current_month)[1])
+                cache[key] = IntradayColumns(
+                    self.data,
+                    start,
+                    end,
+                    asset=None if f_asset == "Todos" else f_asset,
+                    side=None if f_side == "Todos" else f_side,
+                    account=None if f_account == "Todas" else f_account,
+                )
+            return cache[key]
+
+        def fill(tree: ttk.Treeview, rows: List[Dict[str, Any]], labels: List[str]) -> None:
+            tree.delete(*tree.get_children())
+            for row, label in zip(rows, labels):
+                tree.insert("", "end", values=(label, row["count"], f"{row['total']:+.2f}", f"{row['win_rate'] * 100:.1f}%"))
+
+        def refresh(rebuild: bool = False) -> None:
+            if rebuild:
+                cache.clear()
+            cols = columns()
+            info_label.configure(text=f"{len(cols.entries)} operações com horário  |  {cols.without_time} sem horário")
+            slots = cols.by_time_of_day(int(width_var.get()))
+            fill(slots_tree, slots, [slot_label(r) for r in slots])
+            holds = cols.by_holding_time()
+            fill(holds_tree, holds, [hold_label(r, open_ended=(i == len(holds) - 1)) for i, r in enumerate(holds)])
+
+        scope_cb.bind("<<ComboboxSelected>>", lambda e: refresh())
+        width_cb.bind("<<ComboboxSelected>>", lambda e: refresh())
+        ttk.Button(controls, text="Atualizar", command=lambda: refresh(rebuild=True)).pack(side="right")
+        # Ao voltar para a janela, reflete mês, filtros e operações alterados na principal
+        win.bind("<FocusIn>", lambda e: refresh() if e.widget is win else None)
+        refresh()
+
     def _delete_selected_trade(self) -> None:
         selection = self.trades_tree.selection()
         if not selection:
@@ -788,11 +1057,8 @@ class TradeJournalApp(tk.Tk):
 
         trades = self._trades_for_selected_day()
         if 0 <= idx < len(trades):
-            del trades[idx]
-            # if not trades:
-            #    self.data["trades"].pop(_date_key(self.selected_date), None)
-            self._save_data()
-            self._render_calendar()
+            # Exclusão pode ser desfeita (Ctrl+Z)
+            self._apply_ops([("remove", _date_key(self.selected_date), idx)])
 
 
 def main() -> None:
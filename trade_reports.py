@@ -0,0 +1,488 @@
+"""Relatórios HTML de desempenho por conta e período, sem interface gráfica.
+
+Cada relatório é um arquivo HTML autocontido (CSS e gráficos SVG embutidos,
+sem nenhum recurso externo) com o cabeçalho do mês, o calendário de calor,
+a tabela diária e o resumo do período.
+
+    python -m trade_reports --year 2026 --out relatorios
+    python -m trade_reports --month 2026-01 --month 2026-02 --account "Conta Real"
+
+O diário é lido uma vez e as operações são separadas por (conta, mês) numa
+única passada; cada renderização recebe só a sua fatia e roda num pool de
+processos.
+"""
+import argparse
+import calendar
+import hashlib
+import html
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from trade_engine import (
+    BG_CELL_NEUTRAL,
+    BG_CELL_OUT,
+    BG_MAIN,
+    BG_PANEL,
+    DATA_FILE,
+    GREEN,
+    MONTH_NAMES,
+    RED,
+    TEXT_MUTED,
+    TEXT_PRIMARY,
+    format_currency_short,
+    month_title,
+    parse_date_key,
+    parse_month_arg,
+    read_journal,
+    summarize,
+    trade_account,
+    trade_pl,
+)
+
+# O calendário inclui dias dos anos vizinhos, então os extremos de `date` ficam de fora
+MIN_YEAR, MAX_YEAR = 2, 9998
+
+WEEKDAY_NAMES = ["Dom", "Seg", "Ter", "Qua", "Qui", "Sex", "Sáb"]
+
+# Fatia do diário de um relatório: {"AAAA-MM-DD": [trades]}
+Days = Dict[str, List[Dict[str, Any]]]
+# (conta, ano, mês) — mês None indica relatório anual
+ReportKey = Tuple[str, int, Optional[int]]
+
+
+# ---------------------------------------------------------------------------
+# Preparação dos dados
+# ---------------------------------------------------------------------------
+
+def slice_journal(data: Dict[str, Any], accounts: Sequence[str], years: Sequence[int]) -> Dict[Tuple[str, int], Days]:
+    """Separa as operações por (conta, ano) numa única passada pelo diário."""
+    wanted_accounts = set(accounts)
+    wanted_years = set(years)
+    slices: Dict[Tuple[str, int], Days] = {}
+    for key, items in data.get("trades", {}).items():
+        d = parse_date_key(key)
+        if d is None or d.year not in wanted_years or not isinstance(items, list):
+            continue
+        for t in items:
+            if not isinstance(t, dict):
+                # Registro legado inválido: o vacuum o mantém e reporta; aqui é ignorado
+                continue
+            account = trade_account(t)
+            if account in wanted_accounts:
+                slices.setdefault((account, d.year), {}).setdefault(d.isoformat(), []).append(t)
+    return slices
+
+
+def month_days(days: Days, year: int, month: int) -> Days:
+    prefix = f"{year:04d}-{month:02d}-"
+    return {k: v for k, v in days.items() if k.startswith(prefix)}
+
+
+def _day_totals(days: Days) -> Dict[str, float]:
+    return {k: summarize(v)["total"] for k, v in days.items()}
+
+
+def period_stats(days: Days) -> Dict[str, Any]:
+    trades = [t for key in sorted(days) for t in days[key]]
+    stats = summarize(trades)
+    totals = _day_totals(days)
+    stats["days"] = len(totals)
+    stats["best_day"] = max(totals.items(), key=lambda kv: kv[1]) if totals else None
+    stats["worst_day"] = min(totals.items(), key=lambda kv: kv[1]) if totals else None
+    stats["avg_trade"] = stats["total"] / stats["count"] if stats["count"] else 0.0
+    gains = sum(pl for pl in (trade_pl(t) for t in trades) if pl is not None and pl > 0)
+    losses = -sum(pl for pl in (trade_pl(t) for t in trades) if pl is not None and pl < 0)
+    stats["profit_factor"] = gains / losses if losses else None
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Renderização
+# ---------------------------------------------------------------------------
+
+def _signed_short(value: float) -> str:
+    return f"{'+' if value > 0 else ''}{format_currency_short(value)}"
+
+
+def _pl_color(value: float) -> str:
+    return GREEN if value > 0 else RED if value < 0 else TEXT_PRIMARY
+
+
+def _heat_color(value: float, scale: float) -> str:
+    """Verde/vermelho com intensidade proporcional ao resultado do dia."""
+    if abs(value) < 1e-9 or scale <= 0:
+        return BG_CELL_NEUTRAL
+    base = GREEN if value > 0 else RED
+    alpha = 0.35 + 0.65 * min(abs(value) / scale, 1.0)
+    r, g, b = (int(base[i:i + 2], 16) for i in (1, 3, 5))
+    nr, ng, nb = (int(c0 + (c - c0) * alpha) for c, c0 in zip((r, g, b), (0x1a, 0x2d, 0x3b)))
+    return f"#{nr:02x}{ng:02x}{nb:02x}"
+
+
+def svg_month_heatmap(
+    days: Days,
+    year: int,
+    month: int,
+    cell: int = 64,
+    show_weeks: bool = True,
+    scale: Optional[float] = None,
+) -> str:
+    """Calendário do mês (domingo a sábado) colorido pelo resultado de cada dia."""
+    totals = _day_totals(days)
+    if scale is None:
+        scale = max((abs(v) for v in totals.values()), default=0.0)
+    weeks = calendar.Calendar(firstweekday=6).monthdatescalendar(year, month)
+    cols = 8 if show_weeks else 7
+    gap = 3
+    head = 18
+    width = cols * (cell + gap)
+    height = head + len(weeks) * (cell + gap)
+    small = cell < 40
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}" font-family="Segoe UI, sans-serif">'
+    ]
+    labels = WEEKDAY_NAMES + (["Semana"] if show_weeks else [])
+    for c, name in enumerate(labels):
+        x = c * (cell + gap) + cell / 2
+        parts.append(f'<text x="{x:.1f}" y="12" fill="{TEXT_MUTED}" font-size="{9 if small else 11}" text-anchor="middle">{name[:1] if small else name}</text>')
+    for r, week in enumerate(weeks):
+        y = head + r * (cell + gap)
+        week_items: List[Dict[str, Any]] = []
+        for c, d in enumerate(week):
+            x = c * (cell + gap)
+            key = d.isoformat()
+            in_month = d.month == month
+            total = totals.get(key, 0.0)
+            fill = _heat_color(total, scale) if in_month else BG_CELL_OUT
+            count = len(days.get(key, [])) if in_month else 0
+            title = f"{d.strftime('%d/%m/%Y')}: {total:+.2f} ({count} operações)"
+            parts.append(f'<rect x="{x}" y="{y}" width="{cell}" height="{cell}" rx="3" fill="{fill}"><title>{html.escape(title)}</title></rect>')
+            if not in_month:
+                continue
+            week_items.extend(days.get(key, []))
+            if small:
+                continue
+            parts.append(f'<text x="{x + 5}" y="{y + 14}" fill="{TEXT_PRIMARY}" font-size="11">{d.day}</text>')
+            if count:
+                parts.append(f'<text x="{x + cell / 2:.1f}" y="{y + cell / 2 + 4:.1f}" fill="#ffffff" font-size="12" text-anchor="middle">{html.escape(format_currency_short(total))}</text>')
+                parts.append(f'<text x="{x + cell / 2:.1f}" y="{y + cell - 7}" fill="#ffffff" font-size="9" text-anchor="middle">{count} op.</text>')
+        if show_weeks:
+            x = 7 * (cell + gap)
+            ws = summarize(week_items)
+            parts.append(f'<rect x="{x}" y="{y}" width="{cell}" height="{cell}" rx="3" fill="{BG_PANEL}"/>')
+            if not small:
+                parts.append(f'<text x="{x + cell / 2:.1f}" y="{y + cell / 2:.1f}" fill="{_pl_color(ws["total"])}" font-size="12" text-anchor="middle">{html.escape(format_currency_short(ws["total"]))}</text>')
+                parts.append(f'<text x="{x + cell / 2:.1f}" y="{y + cell / 2 + 16:.1f}" fill="{TEXT_MUTED}" font-size="9" text-anchor="middle">{ws["count"]} op.</text>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+def svg_equity_curve(days: Days, width: int = 640, height: int = 160) -> str:
+    """Resultado acumulado dia a dia."""
+    totals = _day_totals(days)
+    if not totals:
+        return ""
+    points = [0.0]
+    for key in sorted(totals):
+        points.append(points[-1] + totals[key])
+    lo, hi = min(points), max(points)
+    span = (hi - lo) or 1.0
+    pad = 8
+    step = (width - 2 * pad) / max(len(points) - 1, 1)
+
+    def y_of(v: float) -> float:
+        return pad + (hi - v) / span * (height - 2 * pad)
+
+    coords = " ".join(f"{pad + i * step:.1f},{y_of(v):.1f}" for i, v in enumerate(points))
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+        f'<rect width="{width}" height="{height}" rx="4" fill="{BG_PANEL}"/>'
+        f'<line x1="{pad}" x2="{width - pad}" y1="{y_of(0):.1f}" y2="{y_of(0):.1f}" stroke="{TEXT_MUTED}" stroke-dasharray="4 4" stroke-width="1"/>'
+        f'<polyline points="{coords}" fill="none" stroke="{_pl_color(points[-1])}" stroke-width="2"/>'
+        "</svg>"
+    )
+
+
+def _stats_html(stats: Dict[str, Any]) -> str:
+    def day(item: Optional[Tuple[str, float]]) -> str:
+        if item is None:
+            return "—"
+        d = parse_date_key(item[0])
+        return f"{d.strftime('%d/%m')} ({item[1]:+.2f})"
+
+    pf = stats["profit_factor"]
+    rows = [
+        ("Resultado", f'<span style="color:{_pl_color(stats["total"])}">{stats["total"]:+.2f}</span>'),
+        ("Operações", str(stats["count"])),
+        ("Dias operados", str(stats["days"])),
+        ("Taxa de acerto", f"{stats['win_rate'] * 100:.1f}% ({stats['wins']} / {stats['losses']})"),
+        ("Média por operação", f"{stats['avg_trade']:+.2f}"),
+        ("Fator de lucro", "—" if pf is None else f"{pf:.2f}"),
+        ("Melhor dia", day(stats["best_day"])),
+        ("Pior dia", day(stats["worst_day"])),
+    ]
+    cells = "".join(f'<div class="stat"><span>{k}</span><strong>{v}</strong></div>' for k, v in rows)
+    return f'<section class="stats">{cells}</section>'
+
+
+def _daily_table_html(days: Days) -> str:
+    if not days:
+        return '<p class="muted">Nenhuma operação no período.</p>'
+    rows = []
+    cumulative = 0.0
+    for key in sorted(days):
+        s = summarize(days[key])
+        cumulative += s["total"]
+        d = parse_date_key(key)
+        rows.append(
+            f"<tr><td>{d.strftime('%d/%m/%Y')}</td><td>{WEEKDAY_NAMES[(d.weekday() + 1) % 7]}</td>"
+            f"<td>{s['count']}</td><td>{s['win_rate'] * 100:.0f}%</td>"
+            f'<td style="color:{_pl_color(s["total"])}">{s["total"]:+.2f}</td>'
+            f'<td style="color:{_pl_color(cumulative)}">{cumulative:+.2f}</td></tr>'
+        )
+    return (
+        "<table><thead><tr><th>Dia</th><th></th><th>Operações</th><th>Acerto</th>"
+        "<th>L/P</th><th>Acumulado</th></tr></thead><tbody>" + "".join(rows) + "</tbody></table>"
+    )
+
+
+def _monthly_table_html(days: Days, year: int) -> str:
+    rows = []
+    cumulative = 0.0
+    for month in range(1, 13):
+        s = summarize(t for v in month_days(days, year, month).values() for t in v)
+        cumulative += s["total"]
+        rows.append(
+            f"<tr><td>{MONTH_NAMES[month]}</td><td>{s['count']}</td><td>{s['win_rate'] * 100:.0f}%</td>"
+            f'<td style="color:{_pl_color(s["total"])}">{s["total"]:+.2f}</td>'
+            f'<td style="color:{_pl_color(cumulative)}">{cumulative:+.2f}</td></tr>'
+        )
+    return (
+        "<table><thead><tr><th>Mês</th><th>Operações</th><th>Acerto</th><th>L/P</th>"
+        "<th>Acumulado</th></tr></thead><tbody>" + "".join(rows) + "</tbody></table>"
+    )
+
+
+PAGE_CSS = f"""
+body {{ background:{BG_MAIN}; color:{TEXT_PRIMARY}; font-family:"Segoe UI",sans-serif; margin:24px; }}
+header {{ display:flex; justify-content:space-between; align-items:baseline; margin-bottom:16px; }}
+h1 {{ font-size:22px; font-weight:normal; margin:0; }}
+h2 {{ font-size:15px; font-weight:normal; color:{TEXT_MUTED}; margin:24px 0 8px; }}
+.profit {{ font-size:20px; }}
+.muted {{ color:{TEXT_MUTED}; }}
+.stats {{ display:flex; flex-wrap:wrap; gap:8px; }}
+.stat {{ background:{BG_PANEL}; padding:8px 12px; border-radius:4px; min-width:130px; }}
+.stat span {{ display:block; font-size:11px; color:{TEXT_MUTED}; }}
+.months {{ display:flex; flex-wrap:wrap; gap:16px; }}
+.months figure {{ margin:0; }}
+.months figcaption {{ font-size:12px; color:{TEXT_MUTED}; margin-bottom:4px; }}
+table {{ border-collapse:collapse; min-width:480px; }}
+th, td {{ padding:4px 12px; text-align:right; border-bottom:1px solid {BG_PANEL}; }}
+th:first-child, td:first-child {{ text-align:left; }}
+th {{ color:{TEXT_MUTED}; font-weight:normal; }}
+a {{ color:{TEXT_PRIMARY}; }}
+"""
+
+
+def _page(title: str, body: str) -> str:
+    return (
+        '<!DOCTYPE html>\n<html lang="pt-BR"><head><meta charset="utf-8">'
+        f"<title>{html.escape(title)}</title><style>{PAGE_CSS}</style></head>"
+        f"<body>{body}</body></html>\n"
+    )
+
+
+def _header(title: str, account: str, total: float) -> str:
+    return (
+        f"<header><div><h1>{html.escape(title)}</h1>"
+        f'<span class="muted">Conta: {html.escape(account)}</span></div>'
+        f'<span class="profit" style="color:{_pl_color(total)}">{html.escape(_signed_short(total))} Lucro</span></header>'
+    )
+
+
+def render_month_report(account: str, year: int, month: int, days: Days) -> str:
+    stats = period_stats(days)
+    body = (
+        _header(month_title(year, month), account, stats["total"])
+        + _stats_html(stats)
+        + "<h2>Calendário</h2>" + svg_month_heatmap(days, year, month)
+        + ("<h2>Resultado acumulado</h2>" + svg_equity_curve(days) if days else "")
+        + "<h2>Resultado diário</h2>" + _daily_table_html(days)
+    )
+    return _page(f"{month_title(year, month)} — {account}", body)
+
+
+def render_year_report(account: str, year: int, days: Days) -> str:
+    stats = period_stats(days)
+    # Mesma escala de cor em todos os meses para que sejam comparáveis
+    scale = max((abs(v) for v in _day_totals(days).values()), default=0.0)
+    months = "".join(
+        f"<figure><figcaption>{MONTH_NAMES[m]}</figcaption>"
+        f"{svg_month_heatmap(month_days(days, year, m), year, m, cell=22, show_weeks=False, scale=scale)}</figure>"
+        for m in range(1, 13)
+    )
+    body = (
+        _header(str(year), account, stats["total"])
+        + _stats_html(stats)
+        + f'<h2>Calendário</h2><div class="months">{months}</div>'
+        + ("<h2>Resultado acumulado</h2>" + svg_equity_curve(days) if days else "")
+        + "<h2>Resultado mensal</h2>" + _monthly_table_html(days, year)
+    )
+    return _page(f"{year} — {account}", body)
+
+
+# ---------------------------------------------------------------------------
+# Geração em lote
+# ---------------------------------------------------------------------------
+
+def account_slug(account: str) -> str:
+    """Nome de pasta legível e único por conta.
+
+    O sufixo com o hash do nome exato evita que contas diferentes caiam na
+    mesma pasta ("Conta Real"/"Conta_Real", ou "Conta"/"conta" no Windows).
+    """
+    slug = re.sub(r"[^\w.-]+", "_", account, flags=re.UNICODE).strip("_")
+    digest = hashlib.sha1(account.encode("utf-8")).hexdigest()[:8]
+    return f"{slug or 'conta'}-{digest}"
+
+
+def report_path(out_dir: Path, key: ReportKey) -> Path:
+    account, year, month = key
+    name = f"{year:04d}-{month:02d}.html" if month else f"{year:04d}.html"
+    return out_dir / account_slug(account) / name
+
+
+def _render_job(out_dir: Path, key: ReportKey, days: Days) -> Path:
+    account, year, month = key
+    if month:
+        text = render_month_report(account, year, month, days)
+    else:
+        text = render_year_report(account, year, days)
+    path = report_path(out_dir, key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def _render_index(out_dir: Path, paths: Dict[ReportKey, Path]) -> Path:
+    by_account: Dict[str, List[ReportKey]] = {}
+    for key in sorted(paths, key=lambda k: (k[0], k[1], k[2] or 0)):
+        by_account.setdefault(key[0], []).append(key)
+    sections = []
+    for account, keys in by_account.items():
+        links = " · ".join(
+            f'<a href="{html.escape(paths[k].relative_to(out_dir).as_posix())}">'
+            f"{html.escape(month_title(k[1], k[2]) if k[2] else str(k[1]))}</a>"
+            for k in keys
+        )
+        sections.append(f"<h2>{html.escape(account)}</h2><p>{links}</p>")
+    path = out_dir / "index.html"
+    path.write_text(_page("Relatórios", "<h1>Relatórios</h1>" + "".join(sections)), encoding="utf-8")
+    return path
+
+
+def generate_reports(
+    data: Dict[str, Any],
+    out_dir: Path,
+    accounts: Sequence[str],
+    months: Sequence[Tuple[int, int]] = (),
+    years: Sequence[int] = (),
+    jobs: Optional[int] = None,
+) -> Dict[ReportKey, Path]:
+    """Gera os relatórios mensais (`months`) e anuais (`years`) de cada conta.
+
+    `jobs` é o número de processos; 1 renderiza no processo atual.
+    """
+    if jobs is not None and jobs < 1:
+        raise ValueError("jobs deve ser pelo menos 1")
+    accounts = list(dict.fromkeys(accounts))
+    all_years = sorted({y for y, _ in months} | set(years))
+    slices = slice_journal(data, accounts, all_years)
+    tasks: List[Tuple[ReportKey, Days]] = []
+    for account in accounts:
+        for year, month in months:
+            tasks.append(((account, year, month), month_days(slices.get((account, year), {}), year, month)))
+        for year in years:
+            tasks.append(((account, year, None), slices.get((account, year), {})))
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths: Dict[ReportKey, Path] = {}
+    if jobs == 1 or len(tasks) <= 1:
+        for key, days in tasks:
+            paths[key] = _render_job(out_dir, key, days)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {key: pool.submit(_render_job, out_dir, key, days) for key, days in tasks}
+            for key, future in futures.items():
+                paths[key] = future.result()
+    _render_index(out_dir, paths)
+    return paths
+
+
+def _parse_year(raw: str) -> int:
+    try:
+        year = int(raw)
+    except ValueError:
+        year = 0
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        raise argparse.ArgumentTypeError(f"ano inválido: {raw!r} (use AAAA entre {MIN_YEAR} e {MAX_YEAR})")
+    return year
+
+
+def _parse_month(raw: str) -> date:
+    d = parse_month_arg(raw)
+    if not MIN_YEAR <= d.year <= MAX_YEAR:
+        raise argparse.ArgumentTypeError(f"mês inválido: {raw!r} (ano entre {MIN_YEAR} e {MAX_YEAR})")
+    return d
+
+
+def _positive_int(raw: str) -> int:
+    try:
+        value = int(raw)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"valor inválido: {raw!r} (use um inteiro maior que zero)")
+    return value
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="trade_reports", description="Gera relatórios HTML de desempenho.")
+    parser.add_argument("--file", type=Path, default=DATA_FILE, help="arquivo do diário")
+    parser.add_argument("--out", type=Path, default=Path("relatorios"), help="pasta de saída")
+    parser.add_argument("--year", type=_parse_year, action="append", default=[], help="ano: relatório anual e um por mês (repetível)")
+    parser.add_argument("--month", type=_parse_month, action="append", default=[], help="mês AAAA-MM (repetível)")
+    parser.add_argument("--account", action="append", default=[], help="conta (repetível); padrão: todas")
+    parser.add_argument("--jobs", type=_positive_int, default=None, help="processos em paralelo (padrão: número de CPUs)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.year and not args.month:
+        args.month = [date.today()]
+
+    start = time.perf_counter()
+    try:
+        # Arquivo ausente ou inválido não pode gerar relatórios zerados em silêncio
+        data = read_journal(args.file)
+    except (OSError, ValueError) as exc:
+        print(f"erro: não foi possível ler {args.file}: {exc}", file=sys.stderr)
+        return 1
+    accounts = args.account or list(data.get("accounts", []))
+    months = sorted({(d.year, d.month) for d in args.month} | {(y, m) for y in args.year for m in range(1, 13)})
+    paths = generate_reports(data, args.out, accounts, months, sorted(set(args.year)), args.jobs)
+    elapsed = time.perf_counter() - start
+    print(f"{len(paths)} relatórios em {args.out} ({elapsed:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())